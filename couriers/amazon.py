@@ -3,11 +3,22 @@ from tools.date_parser import get_local_time
 from tracking.courier import Courier
 from windows.localization import TXT
 
+EVENTS_CONTAINER = '//div[@id="tracking-events-container"]'
+
 
 class Amazon(Courier):
     domain = None
     idship_validation = r"^\d{3}\-\d{7}\-\d{7}$"
     idship_validation_msg = f"3 {TXT.digits}-7 {TXT.digits}-7 {TXT.digits}"
+    locators = dict(
+        product='//*[contains(@class,"tracking-event-carrier-header")]',
+        by_day=f'{EVENTS_CONTAINER}/div/div[@class="a-row"]',
+        day='.//div[contains(@class,"tracking-event-date-header")]',
+        event='.//div[contains(@class,"a-spacing-large")]',
+        hour='.//*[@class="tracking-event-time"]',
+        label='.//*[@class="tracking-event-message"]',
+        status='.//*[@class="tracking-event-location"]',
+    )
 
     def get_url_for_browser(self, idship):
         return True  # so that show button is displayed
@@ -63,33 +74,30 @@ class Amazon(Courier):
         driver.wait_for_visibility(events_loc)
 
     #  do not return any selenium objects, the driver is disposed after
-    @Courier.driversToScrape.get(wait_elt_timeout=30)
+    @Courier.driversToScrape.get(
+        wait_elt_timeout=30,
+        extract=(locators["product"], EVENTS_CONTAINER),
+    )
     def get_content(self, idship, driver):
         self.find_shipment(idship, driver)
-        return driver.page_source
+        return True
 
     def parse_content(self, content):
         events = []
+        xpaths = self.xpaths
 
-        product_loc = '//*[contains(@class,"tracking-event-carrier-header")]'
-        by_day_loc = '//div[@id="tracking-events-container"]/div/div[@class="a-row"]'
-        product = self.get_txt(content, product_loc)
-        for by_day in content.xpath(by_day_loc):
-            day_loc = './/div[contains(@class,"tracking-event-date-header")]'
-            event_loc = './/div[contains(@class,"a-spacing-large")]'
-            day = self.get_txt(by_day, day_loc)
-            for evt in by_day.xpath(event_loc):
-                hour_loc = './/*[@class="tracking-event-time"]'
-                label_loc = './/*[@class="tracking-event-message"]'
-                status_loc = './/*[@class="tracking-event-location"]'
-                hour = self.get_txt(evt, hour_loc)
+        product = self.get_txt(content, xpaths.product)
+        for by_day in xpaths.by_day(content):
+            day = self.get_txt(by_day, xpaths.day)
+            for evt in xpaths.event(by_day):
+                hour = self.get_txt(evt, xpaths.hour)
                 events.append(
                     dict(
                         date=get_local_time(
                             f"{day} {hour}", locale_country=self.domain
                         ),
-                        label=self.get_txt(evt, label_loc),
-                        status=self.get_txt(evt, status_loc).title(),
+                        label=self.get_txt(evt, xpaths.label),
+                        status=self.get_txt(evt, xpaths.status).title(),
                     )
                 )
 
@@ -13,7 +13,10 @@ class Cainiao(Courier):
         return f"https://global.cainiao.com/detail.htm?mailNoList={idship}&lang=en"
 
     #  do not return any selenium objects, the driver is disposed after
-    @Courier.driversToScrape.get(wait_elt_timeout=15)
+    @Courier.driversToScrape.get(
+        wait_elt_timeout=15,
+        extract=('//*[@id="waybill_title"]', '//ol[@class="waybill-path"]'),
+    )
     def get_content(self, idship, driver):
         url = self.get_url_for_browser(idship)
         driver.get(url)
@@ -38,7 +41,7 @@ class Cainiao(Courier):
             self.log(f"driver WAIT datas - {idship}")
             driver.wait_for_visibility(data_locator, 5)
 
-        return driver.page_source
+        return True
 
     def parse_content(self, content):
         events = []
@@ -21,6 +21,14 @@ class ChinaPost(Courier):
     fromto = f"CN{Courier.r_arrow}"
 
     url = "http://yjcx.ems.com.cn/qps/english/yjcx"
+    blocked_resources = ("fonts", "media", "trackers")  # the captcha needs images
+    locators = dict(
+        timeline='//ul[@class="package_list"]/li',
+        day='.//span[@class="data"]',
+        hour='.//span[@class="time"]',
+        label='.//span[@class="text"]',
+        status='.//span[@class="opOrgCity"]',
+    )
 
     def get_url_for_browser(self, idship):
         return True
@@ -65,24 +73,24 @@ class ChinaPost(Courier):
         timeline_loc = '//div[@class="package_container"]'
         return self._solve_captcha(slider, idship, driver, timeline_loc)
 
-    @Courier.driversToScrape.get(wait_elt_timeout=15)
+    @Courier.driversToScrape.get(
+        wait_elt_timeout=15, extract='//div[@class="package_container"]'
+    )
     def get_content(self, idship, driver):
-        if timeline := self._get_timeline(idship, driver):
-            return timeline.get_attribute("innerHTML")
-        return None
+        return bool(self._get_timeline(idship, driver))
 
     def parse_content(self, content):
         events = []
+        xpaths = self.xpaths
         day = ""
-        timeline = content.xpath('//ul[@class="package_list"]/li')
-        for event in timeline:
-            day = self.get_txt(event, './/span[@class="data"]') or day
-            hour = self.get_txt(event, './/span[@class="time"]')
+        for event in xpaths.timeline(content):
+            day = self.get_txt(event, xpaths.day) or day
+            hour = self.get_txt(event, xpaths.hour)
             events.append(
                 dict(
                     date=get_utc_time(f"{day} {hour}"),
-                    label=self.get_txt(event, './/span[@class="text"]'),
-                    status=self.get_txt(event, './/span[@class="opOrgCity"]'),
+                    label=self.get_txt(event, xpaths.label),
+                    status=self.get_txt(event, xpaths.status),
                 )
             )
 
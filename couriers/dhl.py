@@ -1,5 +1,5 @@
 from config import DHL_KEY
-from tools.date_parser import get_local_time
+from tools.date_parser import ISO_FORMAT, get_local_time
 from tracking.courier import Courier, get_simple_validation
 from tracking.requests_handler import RequestsHandler
 
@@ -8,6 +8,8 @@ class DHL(Courier):
     name = "DHL"
     idship_validation, idship_validation_msg = get_simple_validation(10, 39)
     headers = {"Accept": "application/json", "DHL-API-Key": DHL_KEY}
+    rate_limit, rate_burst = 1 / 5, 1  # free plan allows 1 call every 5s
+    date_formats = (ISO_FORMAT,)
 
     def get_url_for_browser(self, idship):
         return f"https://www.dhl.com/fr-en/home/our-divisions/parcel/private-customers/tracking-parcel.html?tracking-id={idship}"
@@ -49,7 +51,7 @@ class DHL(Courier):
                     warn = code == "failure"
 
                 # round dates to minute to better find duplicate
-                date = get_local_time(event["timestamp"])
+                date = get_local_time(event["timestamp"], formats=self.date_formats)
 
                 status = None
                 location = event.get("location")
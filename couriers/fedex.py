@@ -11,6 +11,13 @@ class Fedex(Courier):
     idship_validation = r"^\d{12}(-\d{1})?$"
     idship_validation_msg = f"12 {TXT.digits}[-{TXT.digit}]"
     url = "https://www.fedex.com/fr-fr/home.html"
+    locators = dict(
+        details="//trk-shared-key-value-list//li/div",
+        time='.//td[@headers="time_header"]',
+        status='.//td[@headers="location_header"]',
+        label='.//td[@headers="status_header"]',
+        timeline='//table[@class="travel-history-table full-width"]//tr',
+    )
 
     def get_url_for_browser(self, idship):
         return True  # so that show button is displayed
@@ -76,41 +83,42 @@ class Fedex(Courier):
             details.click()
 
     # do not return any selenium objects, the driver is disposed after
-    @Courier.driversToScrape.get(wait_elt_timeout=60)
+    @Courier.driversToScrape.get(
+        wait_elt_timeout=60,
+        extract=(
+            "//trk-shared-key-value-list",
+            '//table[@class="travel-history-table full-width"]',
+        ),
+    )
     def get_content(self, idship, driver):
         self.find_shipment(idship, driver)
         history_loc = "//trk-shared-travel-history"
         driver.wait_for_presence(history_loc)
-        return driver.page_source
+        return True
 
     def parse_content(self, content):
         events = []
+        xpaths = self.xpaths
 
-        details_loc = "//trk-shared-key-value-list//li/div"
-        if product := self.get_txt(content, details_loc, 1):
-            if weight := self.get_txt(content, details_loc, 3):
+        if product := self.get_txt(content, xpaths.details, 1):
+            if weight := self.get_txt(content, xpaths.details, 3):
                 product = f"{product} { weight}"
 
         day = ""
-        time_loc = './/td[@headers="time_header"]'
-        status_loc = './/td[@headers="location_header"]'
-        label_loc = './/td[@headers="status_header"]'
-        timeline_loc = '//table[@class="travel-history-table full-width"]//tr'
-
-        for tr in content.xpath(timeline_loc):
+        for tr in xpaths.timeline(content):
             if attrib_class := tr.attrib.get("class"):
                 if "scan-event-date-row" in attrib_class:
-                    day = self.get_txt(tr, time_loc)
+                    day = self.get_txt(tr, xpaths.time)
 
                 elif "scan-event-details-row" in attrib_class:
-                    hour = self.get_txt(tr, time_loc)
+                    hour = self.get_txt(tr, xpaths.time)
                     date = f"{day} {hour}"
                     date = get_local_time(date, locale_country=TXT.locale_country_code)
                     events.append(
                         dict(
                             date=date,
-                            status=self.get_txt(tr, status_loc),
-                            label=self.get_txt(tr, label_loc),
+                            status=self.get_txt(tr, xpaths.status),
+                            label=self.get_txt(tr, xpaths.label),
                         )
                     )
 
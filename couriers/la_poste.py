@@ -1,5 +1,5 @@
 from config import LAPOSTE_KEY
-from tools.date_parser import get_local_time
+from tools.date_parser import ISO_FORMAT, get_local_time
 from tracking.courier import Courier, get_sentences
 from tracking.requests_handler import RequestsHandler
 from windows.localization import TXT
@@ -16,6 +16,7 @@ def get_validation(_min, _max, _max2):
 class LaPoste(Courier):
     name = "La Poste"
     idship_validation, idship_validation_msg = get_validation(11, 15, 18)
+    date_formats = (ISO_FORMAT,)
 
     headers = {"X-Okapi-Key": LAPOSTE_KEY, "Accept": "application/json"}
 
@@ -67,7 +68,7 @@ class LaPoste(Courier):
             timeline = list(filter(lambda t: t["status"], shipment.get("timeline")))
             status_label = timeline[-1]["shortLabel"]
             if date := timeline[-1].get("date"):
-                date = get_local_time(date)
+                date = get_local_time(date, formats=self.date_formats)
                 status_label += f" {date:{TXT.long_day_format}}"
             delivered = False
 
@@ -81,7 +82,7 @@ class LaPoste(Courier):
 
                 events.append(
                     dict(
-                        date=get_local_time(event["date"]),
+                        date=get_local_time(event["date"], formats=self.date_formats),
                         status=status,
                         warn=warn,
                         label=label,
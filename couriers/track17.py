@@ -14,13 +14,13 @@ class Track17(Courier):
         return f"https://t.17track.net/fr#nums={idship}"
 
     #  do not return any selenium objects, the driver is disposed after
-    @Courier.driversToScrape.get(wait_elt_timeout=30)
+    @Courier.driversToScrape.get(wait_elt_timeout=30, extract='//*[@class="ori-block"]')
     def get_content(self, idship, driver):
         url = self.get_url_for_browser(idship)
         driver.get(url)
         self.log(f"driver WAIT timeline - {idship}")
         driver.wait_for_visibility(self.timeline_loc)
-        return driver.page_source
+        return True
 
     def parse_content(self, content):
         events = []
@@ -5,12 +5,29 @@ from windows.localization import TXT
 
 class UPS(Courier):
     name = "UPS"
+    locators = dict(
+        status="//track-details-estimation",
+        product='//*[contains(@id,"txtAdditionalInfoShipmentCat")]',
+        weight='//*[contains(@id,"InfoserviceWeight")]',
+        timeline='//*[contains(@id,"activitydetails_row")]',
+        location='.//*[contains(@id, "milestoneActivityLocation")]/text()',
+        label='.//*[contains(@id, "milestoneName")]',
+        day_hour='.//*[contains(@id,"activitiesdateTime")]/text()',
+    )
 
     def get_url_for_browser(self, idship):
         return f"https://www.ups.com/track?loc=fr_FR&tracknum={idship}&requester=ST/trackdetails"
 
     #  do not return any selenium objects, the driver is disposed after
-    @Courier.driversToScrape.get(wait_elt_timeout=10)
+    @Courier.driversToScrape.get(
+        wait_elt_timeout=10,
+        extract=(
+            locators["status"],
+            locators["product"],
+            locators["weight"],
+            locators["timeline"],
+        ),
+    )
     def get_content(self, idship, driver):
         url = self.get_url_for_browser(idship)
         driver.get(url)
@@ -23,37 +40,30 @@ class UPS(Courier):
         self.log(f"driver get TIMELINE - {idship}")
         timeline_locator = '//*[@class="ups-simplified_tracking_wrap-inner"]'
         driver.wait_for_clickable(timeline_locator)
-        return driver.page_source
+        return True
 
     def parse_content(self, content):
         events = []
+        xpaths = self.xpaths
 
-        status_locator = "//track-details-estimation"
-        product_locator = '//*[contains(@id,"txtAdditionalInfoShipmentCat")]'
-        weight_locator = '//*[contains(@id,"InfoserviceWeight")]'
-        timeline_locator = '//*[contains(@id,"activitydetails_row")]'
+        status_label = self.get_txt(content, xpaths.status)
 
-        status_label = self.get_txt(content, status_locator)
-
-        product = self.get_txt(content, product_locator)
+        product = self.get_txt(content, xpaths.product)
         if not product:
             product = TXT.default_product
-        if weight := self.get_txt(content, weight_locator):
+        if weight := self.get_txt(content, xpaths.weight):
             product += f" {weight}"
 
-        timeline = content.xpath(timeline_locator)
+        timeline = xpaths.timeline(content)
         for event in timeline:
-            location_locator = './/*[contains(@id, "milestoneActivityLocation")]/text()'
-            label_locator = './/*[contains(@id, "milestoneName")]'
-            day_hour = './/*[contains(@id,"activitiesdateTime")]/text()'
-            day, hour = event.xpath(day_hour)
+            day, hour = xpaths.day_hour(event)
             events.append(
                 dict(
                     date=get_local_time(
                         f"{day} {hour}", locale_country=TXT.locale_country_code
                     ),
-                    label=self.get_txt(event, label_locator),
-                    status=self.clean_txt(event, location_locator),
+                    label=self.get_txt(event, xpaths.label),
+                    status=self.clean_txt(event, xpaths.location),
                 )
             )
 
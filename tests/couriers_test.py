@@ -58,9 +58,9 @@ if __name__ == "__main__":
                 passed.append(courier_name)
                 events = result["events"]
                 event = events[0]
-                status = f"{event['status']}, " if event["status"] else ""
+                status = f"{event.status}, " if event.status else ""
                 msg += f" - PASS - {len(events)} event(s)\n"
-                msg += f". {event['date']:{TXT.long_date_format}} - {status}{event['label']}"
+                msg += f". {event.date:{TXT.long_date_format}} - {status}{event.label}"
 
             else:
                 failed.append(courier_name)
@@ -31,5 +31,4 @@ for service_module in TranslationService_Modules:
         translation = translation_handler.get(sentence)
         log(f"> '{sentence}' -> '{translation}'")
 
-    if DO_LOAD:
-        translation_handler.save()
+    translation_handler.close()
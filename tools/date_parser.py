@@ -1,4 +1,5 @@
 import calendar
+import functools
 import locale
 from datetime import datetime, timedelta
 
@@ -15,6 +16,9 @@ LOCALE_SETTINGS = dict(
 )
 _locale_parsers = {}
 
+# for datetime.fromisoformat in a courier date_formats, a Z suffix means UTC
+ISO_FORMAT = "ISO"
+
 for country, settings in LOCALE_SETTINGS.items():
     locale.setlocale(locale.LC_TIME, settings["lc_time"])  # date in correct language
 
@@ -35,7 +39,30 @@ def _round_minute(dt):
     return dt.replace(second=0, microsecond=0) + timedelta(minutes=minutes)
 
 
-def _get_time(date, locale_country=None):
+def _parse_with_formats(date, formats):
+    """exact formats are much faster than dateutil"""
+    for date_format in formats:
+        try:
+            if date_format == ISO_FORMAT:
+                # without a time, dateutil default would be used
+                if len(date) > 10:
+                    if date.endswith("Z"):
+                        date = f"{date[:-1]}+00:00"
+                    return datetime.fromisoformat(date)
+
+            else:
+                return datetime.strptime(date, date_format)
+
+        except ValueError:
+            pass
+
+    return None
+
+
+def _get_time(date, locale_country=None, formats=None):
+    if formats and (dt := _parse_with_formats(date, formats)):
+        return _round_minute(dt)
+
     # today at noon
     default = datetime.now().replace(hour=12, minute=0, second=0, microsecond=0)
     parserinfo = _locale_parsers.get(locale_country) if locale_country else None
@@ -44,25 +71,41 @@ def _get_time(date, locale_country=None):
     )
 
 
-def get_local_time(date, locale_country=None):
-    return _get_time(date, locale_country).astimezone(get_localzone())
+@functools.lru_cache(maxsize=None)
+def _get_localzone():
+    return get_localzone()
 
 
-def get_utc_time(date, locale_country=None):
-    return (
-        _get_time(date, locale_country)
-        .replace(tzinfo=pytz.utc)
-        .astimezone(get_localzone())
-    )
+@functools.lru_cache(maxsize=4096)
+def _convert(date, locale_country, utc, formats, _today):
+    """memoized, _today is in the key since it's the default of missing date parts"""
+    dt = _get_time(date, locale_country, formats)
+    if utc:
+        dt = dt.replace(tzinfo=pytz.utc)
+    return dt.astimezone(_get_localzone())
+
+
+def parse_many(dates, locale_country=None, utc=False, formats=None):
+    today = datetime.now().date()
+    formats = tuple(formats) if formats else None
+    return [_convert(date, locale_country, utc, formats, today) for date in dates]
+
+
+def get_local_time(date, locale_country=None, formats=None):
+    return parse_many((date,), locale_country, False, formats)[0]
+
+
+def get_utc_time(date, locale_country=None, formats=None):
+    return parse_many((date,), locale_country, True, formats)[0]
 
 
 def get_utc_from_timestamp(time_stamp):
     return _round_minute(
         datetime.utcfromtimestamp(time_stamp)
         .replace(tzinfo=pytz.utc)
-        .astimezone(get_localzone())
+        .astimezone(_get_localzone())
     )
 
 
 def get_local_now():
-    return datetime.now().astimezone(get_localzone())
+    return datetime.now().astimezone(_get_localzone())
@@ -0,0 +1,87 @@
+import json
+import sqlite3
+import threading
+
+from windows.log import log
+
+from .json_date import json_decode_datetime, json_encode_datetime
+
+DB_EXT = ".db"
+
+
+def _json_loads(txt):
+    return json.loads(txt, object_hook=json_decode_datetime)
+
+
+def json_dumps(obj):
+    return json.dumps(obj, default=json_encode_datetime, ensure_ascii=False)
+
+
+class DBHandler:
+    """
+    thread safe key-value store of json objects in a sqlite file,
+    every write is committed as it happens so that nothing's lost on a crash
+    """
+
+    def __init__(self, filename, table="items"):
+        self.filename = filename + DB_EXT
+        self.table = table
+        self._ops = threading.Lock()
+        # autocommit
+        self._db = sqlite3.connect(
+            self.filename, check_same_thread=False, isolation_level=None
+        )
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} (key TEXT PRIMARY KEY, value TEXT)"
+        )
+        log(f'"{self.filename}" OPENED')
+
+    def _execute(self, sql, *args):
+        with self._ops:
+            if self._db:  # not closed
+                return self._db.execute(sql, *args).fetchall()
+            return []
+
+    def is_empty(self):
+        return not self._execute(f"SELECT 1 FROM {self.table} LIMIT 1")
+
+    def get(self, key, default=None):
+        if rows := self._execute(
+            f"SELECT value FROM {self.table} WHERE key = ?", (key,)
+        ):
+            return _json_loads(rows[0][0])
+        return default
+
+    def values(self):
+        rows = self._execute(f"SELECT value FROM {self.table}")
+        return [_json_loads(value) for (value,) in rows]
+
+    def put(self, key, obj):
+        self.put_dumped(key, json_dumps(obj))
+
+    def put_dumped(self, key, txt):
+        """txt is obj already serialized with json_dumps"""
+        self._execute(f"INSERT OR REPLACE INTO {self.table} VALUES (?, ?)", (key, txt))
+
+    def put_many(self, items):
+        """items is a list of (key, obj) written in a single transaction"""
+        rows = [(key, json_dumps(obj)) for key, obj in items]
+        with self._ops:
+            if not self._db:  # closed
+                return
+            with self._db:  # commit
+                self._db.execute("BEGIN")
+                self._db.executemany(
+                    f"INSERT OR REPLACE INTO {self.table} VALUES (?, ?)", rows
+                )
+
+    def delete(self, key):
+        self._execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+
+    def close(self):
+        with self._ops:
+            self._db.close()
+            self._db = None
+        log(f'"{self.filename}" CLOSED')
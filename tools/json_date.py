@@ -24,4 +24,7 @@ def json_decode_datetime(obj):
 def json_encode_datetime(obj):
     if isinstance(obj, datetime):
         return obj.isoformat()
+    # objects like Event
+    if to_dict := getattr(obj, "to_dict", None):
+        return to_dict()
     return None
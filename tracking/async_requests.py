@@ -0,0 +1,179 @@
+import asyncio
+import atexit
+import heapq
+import itertools
+import threading
+import traceback
+from contextlib import asynccontextmanager
+
+from windows.log import log
+
+from .content_cache import NOT_MODIFIED, add_conditional_headers, is_fresh
+from .requests_handler import RequestsHandler, Retries
+
+try:
+    import httpx
+
+except ImportError:
+    httpx = None
+
+
+class PrioritySemaphore:
+    """asyncio semaphore whose waiters are released by priority, lower first"""
+
+    def __init__(self, value):
+        self._value = value
+        self._waiters = []  # heap of (priority, count, future)
+        self._count = itertools.count()
+
+    async def acquire(self, priority):
+        if self._value > 0 and not self._waiters:
+            self._value -= 1
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._count), future))
+        try:
+            await future
+
+        except asyncio.CancelledError:
+            # the slot was given just before the cancellation
+            if future.done() and not future.cancelled():
+                self.release()
+            raise
+
+    def release(self):
+        while self._waiters:
+            future = heapq.heappop(self._waiters)[2]
+            if not future.done():
+                future.set_result(None)  # hand the slot over
+                return
+        self._value += 1
+
+    @asynccontextmanager
+    async def limit(self, priority):
+        await self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release()
+
+
+class AsyncRequests:
+    """
+    run all RequestsHandler decorated get_content on a single asyncio loop
+    with a global limit of concurrent requests & the couriers limits,
+    waiting requests are run by priority like with UpdateScheduler
+    """
+
+    def __init__(self, max_concurrent_requests):
+        self.loop = asyncio.new_event_loop()
+        threading.Thread(target=self.loop.run_forever, daemon=True).start()
+        self._run(self._create(max_concurrent_requests)).result()
+        atexit.register(self._close)
+
+    @classmethod
+    def create(cls, max_concurrent_requests):
+        """return None if not available"""
+        if max_concurrent_requests:
+            if httpx:
+                log(f"Async requests ({max_concurrent_requests} max)")
+                return cls(max_concurrent_requests)
+
+            log("Async requests need httpx", error=True)
+        return None
+
+    def _run(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    async def _create(self, max_concurrent_requests):
+        # create the asyncio objects inside the loop
+        self._limit = PrioritySemaphore(max_concurrent_requests)
+        self._courier_limits = {}  # courier name: PrioritySemaphore
+        limits = httpx.Limits(max_connections=max_concurrent_requests)
+        self.client = httpx.AsyncClient(limits=limits, follow_redirects=True)
+
+    def _close(self):
+        self._run(self.client.aclose()).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+    @staticmethod
+    def defer(courier, idship, cache=None):
+        """return the request of get_content or None if it can't be done async"""
+        if defer := getattr(courier.get_content, "defer", None):
+            return defer(courier, idship, cache)
+        return None
+
+    def update(self, courier, idship, pending, cache=None, priority=()):
+        """pending is given by defer, return a concurrent.futures.Future"""
+        return self._run(self._update(courier, idship, pending, cache, priority))
+
+    def _get_courier_limit(self, courier):
+        """only called in the loop, None if the courier has no limit"""
+        if max_updates := courier.max_concurrent_updates:
+            if courier.name not in self._courier_limits:
+                self._courier_limits[courier.name] = PrioritySemaphore(max_updates)
+            return self._courier_limits[courier.name]
+        return None
+
+    async def _update(self, courier, idship, pending, cache, priority):
+        try:
+            if not courier.check_idship(idship):
+                return None
+
+            courier.log(f"GET - {idship}")
+            if courier_limit := self._get_courier_limit(courier):
+                async with courier_limit.limit(priority):
+                    r = await self._get_response(courier, idship, pending, priority)
+            else:
+                r = await self._get_response(courier, idship, pending, priority)
+
+            # parsing is cpu bound, don't block the other requests
+            return await asyncio.get_running_loop().run_in_executor(
+                None, self._get_result, courier, idship, pending, r, cache
+            )
+
+        except Exception:  # pylint: disable=broad-except
+            # catch all to keep the flow
+            log(traceback.format_exc(), error=True)
+            return None
+
+    @staticmethod
+    def _get_result(courier, idship, pending, r, cache):
+        content = r
+        if r is not None and r is not NOT_MODIFIED:
+            content = RequestsHandler.to_content(r, pending.as_json, pending.cache)
+        return courier.get_result(idship, content, cache)
+
+    async def _get_response(self, courier, idship, pending, priority):
+        """same retries as RequestsHandler"""
+        retries = Retries(pending.handler, courier, idship)
+        while True:
+            await asyncio.sleep(courier.rate_limiter.reserve())
+            try:
+                r = await self._request(pending, priority)
+                courier.rate_limiter.success()
+
+            except (httpx.TimeoutException, httpx.HTTPStatusError) as e:
+                retries.failure(e, getattr(e, "response", None))
+                r = None
+
+            if (delay := retries.get_delay(r)) is None:
+                return r
+            await asyncio.sleep(delay)
+
+    async def _request(self, pending, priority):
+        """return the response or NOT_MODIFIED"""
+        if is_fresh(pending.cache):
+            return NOT_MODIFIED
+
+        kwargs = add_conditional_headers(pending.cache, pending.kwargs)
+        async with self._limit.limit(priority):
+            r = await self.client.request(
+                pending.method,
+                pending.url,
+                timeout=pending.handler.request_timeout,
+                **kwargs,
+            )
+        r = RequestsHandler.check_response(r, pending.cache)
+        return NOT_MODIFIED if r is None else r
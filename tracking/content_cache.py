@@ -0,0 +1,58 @@
+"""
+a courier cache is a dict kept in the courier content of a tracker,
+it's given back to the courier at each update of the same idship
+"""
+
+import hashlib
+import re
+import time
+
+# returned by get_content when the previous parsed content is still valid
+NOT_MODIFIED = "NOT MODIFIED"
+
+_search_max_age = re.compile(r"max-age=(\d+)").search
+
+
+def is_fresh(cache):
+    return cache is not None and cache.get("expires", 0) > time.time()
+
+
+def add_conditional_headers(cache, kwargs):
+    """return a copy of the request kwargs with the validators headers"""
+    headers = dict(kwargs.get("headers") or {})
+    if cache:
+        if etag := cache.get("etag"):
+            headers["If-None-Match"] = etag
+        if last_modified := cache.get("last_modified"):
+            headers["If-Modified-Since"] = last_modified
+    return dict(kwargs, headers=headers)
+
+
+def update_validators(cache, headers):
+    if cache is not None:
+        if etag := headers.get("ETag"):
+            cache["etag"] = etag
+        if last_modified := headers.get("Last-Modified"):
+            cache["last_modified"] = last_modified
+
+        cache_control = headers.get("Cache-Control", "")
+        max_age = _search_max_age(cache_control)
+        if max_age and "no-cache" not in cache_control:
+            cache["expires"] = time.time() + int(max_age.group(1))
+        else:
+            cache.pop("expires", None)
+
+
+def is_unchanged(cache, raw_content):
+    """compare the fingerprints of the raw content (bytes or str) & update it"""
+    if cache is None or raw_content is None:
+        return False
+
+    if isinstance(raw_content, str):
+        raw_content = raw_content.encode("utf8")
+    fingerprint = hashlib.blake2b(raw_content, digest_size=16).hexdigest()
+    if cache.get("fingerprint") == fingerprint:
+        return True
+
+    cache["fingerprint"] = fingerprint
+    return False
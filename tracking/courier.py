@@ -1,16 +1,35 @@
+import functools
 import re
 import webbrowser
 from abc import ABC, abstractmethod
+from types import SimpleNamespace
 
+from lxml import etree
 from windows.localization import TXT
 from windows.log import log
 
+from .content_cache import NOT_MODIFIED
 from .drivers_handler import DriversToScrape, DriversToShow
+from .event import Event
+from .rate_limiter import RateLimiter
 
 # auto register all Courier subclasses, check Courier.__init_subclass__
 Couriers_classes = []
 
 
+_normalize_space = etree.XPath("normalize-space()")
+
+
+@functools.lru_cache(maxsize=None)
+def get_xpath(xpath):
+    """compiled once"""
+    return etree.XPath(xpath)
+
+
+def _to_xpath(xpath):
+    return get_xpath(xpath) if isinstance(xpath, str) else xpath
+
+
 def get_sentences(txt, n=1):
     return "".join(re.split(r"[.!]", txt)[:n])
 
@@ -36,6 +55,13 @@ class Courier(ABC):
     fromto = None
     idship_validation, idship_validation_msg = get_simple_validation(8, 20)
     name = None
+    max_concurrent_updates = None  # no limit except UpdateScheduler max_workers
+    rate_limit = None  # requests per second, None for no limit
+    rate_burst = 1
+    date_formats = None  # exact formats tried before dateutil, see date_parser
+    locators = {}  # name: xpath, compiled in cls.xpaths
+    # resources not loaded by the scrapers, () to opt out, see drivers_handler
+    blocked_resources = ("images", "fonts", "media", "trackers")
 
     error_words = ("error", "erreur")
 
@@ -55,8 +81,7 @@ class Courier(ABC):
     subs = (
         (r"[\(\[].*?[\)\]]", ""),  # remove () and []
         (r"[\.\,]$", ""),  # remove ending '.' or ','
-        (r"\xa0", " "),  # non breaking space
-        (r" +", " "),  # remove extra spaces
+        (r"[\xa0 ]+", " "),  # non breaking spaces & extra spaces
         (r"[\n\r]", ""),  # remove line return
         (r"^\W", ""),  # remove leading non alphanumeric char
         (r"(\w):(\w)", r"\1: \2"),  # add space after ':'
@@ -64,25 +89,47 @@ class Courier(ABC):
     additional_subs = ()
 
     def __init_subclass__(cls):
-        """register subclasses"""
+        """register subclasses & compile their re"""
         if cls.name:
             Couriers_classes.append(cls)
 
+        # self.xpaths.name(elt) or self.get_txt(elt, self.xpaths.name)
+        cls.xpaths = SimpleNamespace(
+            **{name: get_xpath(xpath) for name, xpath in cls.locators.items()}
+        )
+
+        # single searches on the lowered txt, (?!) never matches
+        delivered = cls.additional_delivered_searchs + cls.delivered_searchs
+        cls._search_delivered = re.compile(
+            "|".join(f"(?:{pattern.lower()})" for pattern in delivered) or "(?!)"
+        ).search
+        cls._search_warn = re.compile(
+            "|".join(re.escape(word.lower()) for word in cls.error_words) or "(?!)"
+        ).search
+        cls._subs = [
+            (re.compile(pattern).sub, replace)
+            for (pattern, replace) in cls.additional_subs + cls.subs
+        ]
+
     @classmethod
     def set_max_scrape_drivers(cls, max_drivers):
         cls.driversToScrape.set_max_drivers(max_drivers)
 
+    @classmethod
+    def start_scrape_drivers_pool(cls, *args, **kwargs):
+        cls.driversToScrape.start_pool(*args, **kwargs)
+
     def __init__(self):
+        self.rate_limiter = RateLimiter(self.rate_limit, self.rate_burst)
+
         # compile re
         self.idship_validation = re.compile(self.idship_validation).match
-        self.delivered_searchs = [
-            re.compile(pattern.lower()).search
-            for pattern in self.additional_delivered_searchs + self.delivered_searchs
-        ]
-        self.subs = [
-            (re.compile(pattern).sub, replace)
-            for (pattern, replace) in self.additional_subs + self.subs
-        ]
+
+    def get_update_limit_keys(self):
+        """scrapers also share the drivers limit"""
+        if drivers := getattr(self.get_content, "drivers", None):
+            return self.name, drivers.name
+        return (self.name,)
 
     def log(self, *args, **kwargs):
         args = list(args)
@@ -106,22 +153,24 @@ class Courier(ABC):
 
     @abstractmethod
     def get_content(self, idship):
-        pass
+        """decorated with RequestsHandler or DriversToScrape that add cache"""
 
     @staticmethod
     def get_txt(elt, xpath, index=0):
+        """xpath is a string or a compiled xpath"""
         try:
-            return elt.xpath(xpath)[index].xpath("normalize-space()")
+            return _normalize_space(_to_xpath(xpath)(elt)[index])
 
         except IndexError:
             return None
 
     @staticmethod
     def clean_txt(elt, xpath):
+        """xpath is a string or a compiled xpath"""
         try:
             return " ".join(
                 txt_clean
-                for txt in elt.xpath(xpath)
+                for txt in _to_xpath(xpath)(elt)
                 if (txt_clean := txt.replace("\n", "").strip())
             )
 
@@ -129,40 +178,41 @@ class Courier(ABC):
             return None
 
     def _apply_subs(self, txt):
-        for sub, replace in self.subs:
+        for sub, replace in self._subs:
             txt = sub(replace, txt.strip())
         return txt
 
     def _update_events(self, events):
         delivered = False
-
-        # remove duplicate events while keeping insertion order, won't work with a set
-        events = {tuple(evt.items()): evt for evt in events}.values()
-
-        # sort by date
-        events = sorted(events, key=lambda evt: evt["date"], reverse=True)
+        updated_events = []
 
         for event in events:
-            event["courier"] = self.name
-            event["status"] = event.get("status") or ""
+            status = event.get("status") or ""
 
             # clean label
-            event["label"] = self._apply_subs(event["label"])
-            event["status"] = self._apply_subs(event["status"])
+            label = self._apply_subs(event["label"])
+            status = self._apply_subs(status)
 
             # delivered ?
-            whole_txt = " ".join((event["status"], event["label"]))
-            event["delivered"] = event.get("delivered", False) or any(
-                search(whole_txt.lower()) for search in self.delivered_searchs
+            whole_txt = " ".join((status, label)).lower()
+            event_delivered = event.get("delivered", False) or bool(
+                self._search_delivered(whole_txt)
             )
 
-            if event["delivered"]:
+            if event_delivered:
                 delivered = True
 
             # warn ?
-            event["warn"] = event.get("warn", False) or any(
-                error_word in whole_txt.lower() for error_word in self.error_words
+            warn = event.get("warn", False) or bool(self._search_warn(whole_txt))
+            updated_events.append(
+                Event(event["date"], label, status, self.name, warn, event_delivered)
             )
+
+        # remove duplicate events while keeping insertion order
+        events = dict.fromkeys(updated_events)
+
+        # sort by date
+        events = sorted(events, key=lambda evt: evt.date, reverse=True)
         return events, delivered
 
     def _update_status(self, infos, ok, events, delivered):
@@ -173,9 +223,9 @@ class Courier(ABC):
 
         if events:
             last_event = events[0]
-            default_status_date = last_event["date"]
-            default_status_label = last_event["label"]
-            default_status_warn = last_event.get("warn", False)
+            default_status_date = last_event.date
+            default_status_label = last_event.label
+            default_status_warn = last_event.warn
 
         else:
             default_status_date = None
@@ -194,23 +244,39 @@ class Courier(ABC):
             delivered=delivered,
         )
 
-    def update(self, idship):
+    def check_idship(self, idship):
         if not self.validate_idship(idship):
             self.log(
                 f"invalid tracking number {idship}, ({self.idship_validation_msg})",
                 error=True,
             )
+            return False
+        return True
+
+    def update(self, idship, cache=None):
+        """cache is the courier cache of the idship, it's updated by get_content"""
+        if not self.check_idship(idship):
             return None
 
-        events = []
-        infos = {}
         self.log(f"GET - {idship}")
         try:
-            content = self.get_content(idship)
+            # the decorators add cache
+            content = self.get_content(  # pylint: disable=too-many-function-args
+                idship, cache
+            )
 
         except CourierRetryError:
             content = None
 
+        return self.get_result(idship, content, cache)
+
+    def get_result(self, idship, content, cache=None):
+        if content is NOT_MODIFIED:
+            self.log(f"NOT MODIFIED - {idship}")
+            return dict(ok=True, not_modified=True, idship=idship, cache=cache)
+
+        events = []
+        infos = {}
         if ok := content is not None:
             self.log(f"PARSE - {idship}")
             if result := self.parse_content(content):
@@ -226,4 +292,5 @@ class Courier(ABC):
             fromto=infos.get("fromto", self.fromto),
             status=status,
             events=events,
+            cache=cache if ok else None,
         )
@@ -3,15 +3,39 @@
 import couriers
 from windows.log import log
 
+from .async_requests import AsyncRequests
 from .courier import Courier, Couriers_classes
+from .requests_handler import RequestsHandler
+from .scheduler import UpdateScheduler
 
 
 class CouriersHandler:
-    def __init__(self, max_drivers=2):
+    def __init__(
+        self,
+        max_drivers=2,
+        min_drivers=1,
+        drivers_idle_timeout=300,
+        drivers_max_scrapes=200,
+        drivers_max_rss_mb=1024,
+        sessions_per_host=4,
+        max_async_requests=32,
+        max_update_workers=8,
+    ):
         self.couriers = {cls.name: cls() for cls in Couriers_classes}
         log(f"CREATE Couriers: {' . '.join(sorted(self.couriers))}")
 
         Courier.set_max_scrape_drivers(max_drivers)
+        Courier.start_scrape_drivers_pool(
+            min_drivers, drivers_idle_timeout, drivers_max_scrapes, drivers_max_rss_mb
+        )
+        RequestsHandler.set_sessions_per_host(sessions_per_host)
+        self.async_requests = AsyncRequests.create(max_async_requests)
+
+        self.scheduler = UpdateScheduler(max_update_workers)
+        self.scheduler.set_limit(Courier.driversToScrape.name, max_drivers)
+        for courier in self.couriers.values():
+            if courier.max_concurrent_updates:
+                self.scheduler.set_limit(courier.name, courier.max_concurrent_updates)
 
     def exists(self, name):
         return bool(self.couriers.get(name))
@@ -35,10 +59,34 @@ class CouriersHandler:
             return courier.idship_validation_msg
         return ""
 
-    def update(self, name, idship):
+    def update(self, name, idship, cache=None):
+        if courier := self.couriers.get(name):
+            return courier.update(idship, cache)
+        return None
+
+    def schedule_update(self, priority, name, update, *args):
+        """update(name, *args) is run by a shared worker, return a Future"""
         if courier := self.couriers.get(name):
-            return courier.update(idship)
+            limit_keys = courier.get_update_limit_keys()
+            return self.scheduler.submit(priority, limit_keys, update, name, *args)
+        return None
+
+    def update_async(self, priority, name, idship, cache=None):
+        """
+        return a Future if the courier can be updated with AsyncRequests,
+        with the same priority & courier limit as with schedule_update,
+        None if it has to be updated with schedule_update
+        """
+        if self.async_requests and (courier := self.couriers.get(name)):
+            if pending := self.async_requests.defer(courier, idship, cache):
+                return self.async_requests.update(
+                    courier, idship, pending, cache, priority
+                )
         return None
 
     def get_names(self):
         return list(self.couriers)
+
+    @staticmethod
+    def close():
+        RequestsHandler.log_sessions_stats()
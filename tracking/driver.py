@@ -1,3 +1,5 @@
+import base64
+import json
 import time
 
 import undetected_chromedriver as webdriver
@@ -38,7 +40,16 @@ class EnhancedOptions(webdriver.ChromeOptions):
         },
     }
 
-    def __init__(self, headless=False, auto_translate=False):
+    # no permission popup or media, safe for all the scrapped pages
+    block_prefs = {
+        "profile.default_content_setting_values.notifications": 2,
+        "profile.default_content_setting_values.geolocation": 2,
+        "profile.default_content_setting_values.media_stream": 2,
+    }
+
+    def __init__(
+        self, headless=False, auto_translate=False, block=False, performance_log=False
+    ):
         super().__init__()
         self.headless = headless
 
@@ -48,8 +59,14 @@ class EnhancedOptions(webdriver.ChromeOptions):
         prefs = self.default_prefs.copy()
         if auto_translate:
             prefs.update(self.translate_prefs)
+        if block:
+            prefs.update(self.block_prefs)
         self.add_experimental_option("prefs", prefs)
 
+        # network events, see EnhancedChrome.wait_for_response
+        if performance_log:
+            self.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+
 
 class EnhancedChrome(webdriver.Chrome):
     """find & wait tools"""
@@ -58,12 +75,55 @@ class EnhancedChrome(webdriver.Chrome):
         super().__init__(*args, version_main=Chrome_Version, **kwargs)
         self._wait_elt_timeout = 0
         self._driver_wait = None
+        self._blocked_urls = None
 
     def set_timeouts(self, page_load_timeout, wait_elt_timeout):
         self.set_page_load_timeout(page_load_timeout)
         self._wait_elt_timeout = wait_elt_timeout
         self._driver_wait = WebDriverWait(self, wait_elt_timeout)
 
+    def block_urls(self, urls):
+        """with devtools, urls are patterns with * wildcards"""
+        urls = list(urls)
+        if urls != self._blocked_urls:
+            if self._blocked_urls is None:
+                self.execute_cdp_cmd("Network.enable", {})
+            self.execute_cdp_cmd("Network.setBlockedURLs", {"urls": urls})
+            self._blocked_urls = urls
+
+    def clear_performance_log(self):
+        self.get_log("performance")
+
+    def wait_for_response(self, url_search, timeout=None):
+        """
+        body of the 1st response whose url matches url_search,
+        once it's been fully loaded according to the performance log
+        """
+        request_ids = set()
+        end_time = time.time() + (timeout or self._wait_elt_timeout)
+        while time.time() < end_time:
+            for entry in self.get_log("performance"):
+                message = json.loads(entry["message"])["message"]
+                method, params = message["method"], message.get("params", {})
+
+                if method == "Network.responseReceived":
+                    if url_search(params["response"]["url"]):
+                        request_ids.add(params["requestId"])
+
+                elif method == "Network.loadingFinished":
+                    if (request_id := params["requestId"]) in request_ids:
+                        response = self.execute_cdp_cmd(
+                            "Network.getResponseBody", {"requestId": request_id}
+                        )
+                        body = response["body"]
+                        if response.get("base64Encoded"):
+                            body = base64.b64decode(body).decode("utf8")
+                        return body
+
+            time.sleep(0.1)
+
+        raise TimeoutException("Error waiting for a captured response")
+
     def wait_until(self, until, timeout=None):
         if timeout and timeout != self._wait_elt_timeout:
             return WebDriverWait(self, timeout).until(until)
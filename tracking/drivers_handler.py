@@ -1,7 +1,10 @@
 import atexit
+import json
 import os
 import queue
+import re
 import threading
+import time
 from socket import error as SocketError
 from subprocess import CREATE_NO_WINDOW
 
@@ -17,13 +20,60 @@ from selenium.common.exceptions import (
 from urllib3.exceptions import MaxRetryError, NewConnectionError, ProtocolError
 from windows.log import log
 
+from .content_cache import NOT_MODIFIED, is_unchanged
 from .driver import EnhancedChrome, EnhancedOptions
 
+# url patterns of the resources a scraper can do without, see Courier.blocked_resources
+BLOCKED_URLS = dict(
+    images=("*.png*", "*.jpg*", "*.jpeg*", "*.gif*", "*.webp*", "*.svg*", "*.ico*"),
+    fonts=("*.woff*", "*.woff2*", "*.ttf*", "*.otf*"),
+    media=("*.mp4*", "*.webm*", "*.mp3*", "*.m3u8*"),
+    css=("*.css*",),
+    trackers=(
+        "*google-analytics.com*",
+        "*googletagmanager.com*",
+        "*doubleclick.net*",
+        "*connect.facebook.net*",
+        "*hotjar.com*",
+        "*quantummetric.com*",
+    ),
+)
+
+
+def get_blocked_urls(resources):
+    return [url for resource in resources for url in BLOCKED_URLS[resource]]
+
+
+def _get_rss(driver):
+    """memory used by the chromedriver & chrome process trees"""
+    service_process = getattr(getattr(driver, "service", None), "process", None)
+    pids = {getattr(service_process, "pid", None), getattr(driver, "browser_pid", None)}
+
+    processes = {}
+    for pid in pids - {None}:
+        try:
+            process = psutil.Process(pid)
+            for proc in (process, *process.children(recursive=True)):
+                processes[proc.pid] = proc
+        except psutil.Error:
+            pass
+
+    rss = 0
+    for proc in processes.values():
+        try:
+            rss += proc.memory_info().rss
+        except psutil.Error:
+            pass
+    return rss
+
 
 class DriversHandler:
     name = None
     headless = False
     auto_translate = True
+    block = False
+    performance_log = False
+    recycle_backoff = 60  # s without recycling after a failed replacement
 
     _terminate_lock = threading.Lock()
 
@@ -35,16 +85,78 @@ class DriversHandler:
         self._driver_count_ops = threading.Lock()
         atexit.register(self._close)
 
+        # see start_pool
+        self.min_drivers = 0
+        self.idle_timeout = None
+        self.max_scrapes = None
+        self.max_rss = None
+        self._idle_since = {}
+        self._n_scrapes = {}
+        self._recycle_failed_at = None
+
+    def start_pool(
+        self, min_drivers=0, idle_timeout=None, max_scrapes=None, max_rss_mb=None
+    ):
+        """
+        create min_drivers in the background,
+        then quit the drivers idle for more than idle_timeout s, down to min_drivers.
+        a driver is replaced after max_scrapes or when it uses more than max_rss_mb
+        """
+        self.min_drivers = min(min_drivers, self.max_drivers)
+        self.idle_timeout = idle_timeout
+        self.max_scrapes = max_scrapes
+        self.max_rss = max_rss_mb and max_rss_mb * 2**20
+        # daemon thread that'll be killed when exiting
+        threading.Thread(target=self._manage_pool, daemon=True).start()
+
+    def _manage_pool(self):
+        self._prewarm()
+        while self.idle_timeout:
+            time.sleep(self.idle_timeout / 4)
+            self._reap_idle()
+            self._prewarm()
+
+    def _prewarm(self):
+        while True:
+            with self._driver_count_ops:
+                n_drivers = len(self._drivers) + self._n_in_creation
+            if n_drivers >= self.min_drivers or not self._create_driver():
+                break
+
+    def _reap_idle(self):
+        with self._driver_count_ops:
+            n_drivers = len(self._drivers)
+
+        # only the available drivers are idle, the expired ones are removed
+        # in place so that the queue never looks empty to _get
+        now = time.time()
+        available = self._drivers_available
+        with available.mutex:
+            idle = [
+                driver
+                for driver in available.queue
+                if now - self._idle_since.get(driver, now) > self.idle_timeout
+            ][: max(0, n_drivers - self.min_drivers)]
+            for driver in idle:
+                available.queue.remove(driver)
+
+        for driver in idle:
+            log(f"IDLE {self.name}")
+            self._destroy(driver)
+
     def _log_creation(self, txt, n_drivers, error=False):
         msg = f"{self.name} {txt}"
         n_max = "∞" if repr(self.max_drivers) == "inf" else self.max_drivers
         msg += f" ({n_drivers + 1}/{n_max})"
         log(msg, error=error)
 
-    def _create_driver(self):
+    def _create_driver(self, replaced=None):
+        """replaced is quit once its replacement is available"""
         with self._driver_count_ops:
             n_drivers = len(self._drivers) + self._n_in_creation
-            if can_create := n_drivers < self.max_drivers:
+            if replaced:
+                n_drivers -= 1
+            if can_create := bool(replaced) or n_drivers < self.max_drivers:
                 self._n_in_creation += 1
 
         if can_create:
@@ -54,6 +166,8 @@ class DriversHandler:
                 options = EnhancedOptions(
                     headless=self.headless,
                     auto_translate=self.auto_translate,
+                    block=self.block,
+                    performance_log=self.performance_log,
                 )
                 driver = EnhancedChrome(
                     options=options, service_creationflags=CREATE_NO_WINDOW
@@ -68,8 +182,19 @@ class DriversHandler:
                     self._n_in_creation -= 1
                     if driver:
                         self._drivers.append(driver)
+                        self._idle_since[driver] = time.time()
                         self._drivers_available.put(driver)
 
+                if replaced:
+                    if driver:
+                        self._destroy(replaced)
+                    else:
+                        # back in use like a fresh driver, recycled later
+                        self._recycle_failed_at = time.time()
+                        self._n_scrapes[replaced] = 0
+                        self._idle_since[replaced] = time.time()
+                        self._drivers_available.put(replaced)
+
             return driver
         return None
 
@@ -91,13 +216,44 @@ class DriversHandler:
         return self._drivers_available.get()
 
     def _dispose(self, driver):
-        self._drivers_available.put(driver)
+        if self.performance_log:  # don't let it grow
+            try:
+                driver.clear_performance_log()
+            except WebDriverException:
+                pass
+        n_scrapes = self._n_scrapes.get(driver, 0) + 1
+        self._n_scrapes[driver] = n_scrapes
+        if reason := self._should_recycle(driver, n_scrapes):
+            # the other drivers are still available during the replacement
+            log(f"RECYCLE {self.name} ({reason})")
+            threading.Thread(
+                target=self._create_driver, args=(driver,), daemon=True
+            ).start()
+
+        else:
+            self._idle_since[driver] = time.time()
+            self._drivers_available.put(driver)
+
+    def _should_recycle(self, driver, n_scrapes):
+        if (failed_at := self._recycle_failed_at) is not None:
+            if time.time() - failed_at < self.recycle_backoff:
+                return None
+
+        if self.max_scrapes and n_scrapes >= self.max_scrapes:
+            return f"{n_scrapes} scrapes"
+
+        if self.max_rss and (rss := _get_rss(driver)) >= self.max_rss:
+            return f"{rss // 2**20} MB"
+
+        return None
 
     def _destroy(self, driver):
         with self._driver_count_ops:
             log(f"QUIT {self.name}")
             driver.quit()
             self._drivers.remove(driver)
+            self._idle_since.pop(driver, None)
+            self._n_scrapes.pop(driver, None)
 
     def _close(self):
         log(f"CLOSING {self.name}")
@@ -135,22 +291,75 @@ class DriversToScrape(DriversHandler):
     name = "Chromedriver (scrapper)"
     headless = True
     auto_translate = False
+    block = True
+
+    # outerHTML of all the elements found by the xpaths in arguments[0],
+    # except those already in an extracted element
+    extract_script = """
+        const found = new Set();
+        for (const xpath of arguments[0]) {
+            const snapshot = document.evaluate(
+                xpath, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null
+            );
+            for (let i = 0; i < snapshot.snapshotLength; i++) {
+                found.add(snapshot.snapshotItem(i));
+            }
+        }
+        const elts = [...found];
+        return elts
+            .filter((elt) => !elts.some((o) => o !== elt && o.contains(elt)))
+            .map((elt) => elt.outerHTML)
+            .join("");
+    """
 
     def set_max_drivers(self, max_drivers):
         self.max_drivers = max_drivers
 
-    def get(self, page_load_timeout=100, wait_elt_timeout=30):
+    def _extract(self, driver, xpaths):
+        """only transfer & parse what's needed"""
+        if html := driver.execute_script(self.extract_script, xpaths):
+            return f"<div>{html}</div>"
+        return None
+
+    def get(
+        self, page_load_timeout=100, wait_elt_timeout=30, extract=None, capture=None
+    ):
         """
         decorator to give the decorated function a driver
-        and handle get_content with timeouts
+        and handle get_content with timeouts.
+        with extract, an xpath or a tuple of xpaths, get_content returns True
+        & the content is the elements found in the page, within a div.
+        with capture, a regex of an url, get_content returns True once the page
+        is requested & the content is the json of the 1st response matching capture
         """
+        if isinstance(extract, str):
+            extract = (extract,)
+
+        if capture:
+            capture = re.compile(capture).search
+            # only when needed, since all the network events are logged
+            self.performance_log = True
 
         def inner(get_content):
-            def wrapper(courier, idship):
+            def wrapper(courier, idship, cache=None):
+                courier.rate_limiter.wait()  # before holding a driver
                 if driver := self._get():
                     driver.set_timeouts(page_load_timeout, wait_elt_timeout)
                     try:
-                        if content := get_content(courier, idship, driver):
+                        # drivers are shared, set the courier blocking each time
+                        blocked_urls = get_blocked_urls(courier.blocked_resources)
+                        driver.block_urls(blocked_urls)
+                        content = get_content(courier, idship, driver)
+                        if content and capture:
+                            content = driver.wait_for_response(capture)
+                        elif content and extract:
+                            content = self._extract(driver, extract)
+
+                        if content:
+                            if is_unchanged(cache, content):
+                                return NOT_MODIFIED
+                            if capture:
+                                return json.loads(content)
                             return lxml.html.fromstring(content)
                         error = "No Content"
 
@@ -161,6 +370,8 @@ class DriversToScrape(DriversHandler):
                         ProtocolError,
                         NewConnectionError,
                         MaxRetryError,
+                        json.JSONDecodeError,
+                        UnicodeDecodeError,
                     ) as e:
                         error = type(e).__name__
 
@@ -173,6 +384,7 @@ class DriversToScrape(DriversHandler):
                 courier.log(f"driver FAILURE - {error} for {idship}", error=True)
                 return None
 
+            wrapper.drivers = self
             return wrapper
 
         return inner
@@ -0,0 +1,89 @@
+class Event:
+    """
+    compact event hashed with its key that's computed once,
+    it should be considered read-only except for new
+    """
+
+    __slots__ = (
+        "date",
+        "label",
+        "status",
+        "courier",
+        "warn",
+        "delivered",
+        "new",
+        "key",
+    )
+
+    def __init__(
+        self,
+        date,
+        label,
+        status="",
+        courier=None,
+        warn=False,
+        delivered=False,
+        new=False,
+        key=None,
+    ):
+        self.date = date
+        self.label = label
+        self.status = status or ""
+        self.courier = courier
+        self.warn = warn
+        self.delivered = delivered
+        self.new = new
+        self.key = key or (date, courier, self.status, label, warn, delivered)
+
+    def __hash__(self):
+        return hash(self.key)
+
+    def __eq__(self, other):
+        return isinstance(other, Event) and self.key == other.key
+
+    def __reduce__(self):
+        """for pickle & copy"""
+        return Event.from_dict, (self.to_dict(),)
+
+    def __repr__(self):
+        return f"Event({self.to_dict()})"
+
+    def translated(self, label):
+        """a copy with a translated label and the same key"""
+        return Event(
+            self.date,
+            label,
+            self.status,
+            self.courier,
+            self.warn,
+            self.delivered,
+            self.new,
+            self.key,
+        )
+
+    def to_dict(self):
+        """same shape as the former event dicts"""
+        return dict(
+            date=self.date,
+            status=self.status,
+            label=self.label,
+            warn=self.warn,
+            delivered=self.delivered,
+            courier=self.courier,
+            new=self.new,
+        )
+
+    @classmethod
+    def from_dict(cls, event):
+        if isinstance(event, cls):
+            return event
+
+        return cls(
+            event["date"],
+            event["label"],
+            event.get("status"),
+            event.get("courier"),
+            event.get("warn", False),
+            event.get("delivered", False),
+            event.get("new", False),
+        )
@@ -0,0 +1,77 @@
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+from tools.date_parser import get_local_now
+
+THROTTLED_STATUS_CODES = (429, 503)
+
+
+def get_retry_after(headers):
+    """Retry-After in seconds, it's either a number of seconds or a http date"""
+    if retry_after := headers.get("Retry-After"):
+        try:
+            return max(0, float(retry_after))
+
+        except ValueError:
+            try:
+                date = parsedate_to_datetime(retry_after)
+                return max(0, (date - get_local_now()).total_seconds())
+
+            except (TypeError, ValueError):
+                pass
+    return None
+
+
+class RateLimiter:
+    """
+    token bucket of rate requests per second & burst size,
+    and an adaptive backoff when throttled
+    """
+
+    def __init__(self, rate=None, burst=1, base_backoff=2, max_backoff=120):
+        self.rate = rate  # None for no limit
+        self.burst = burst
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self._tokens = burst
+        self._last = time.monotonic()
+        self._blocked_until = 0
+        self._n_backoff = 0
+        self._ops = threading.Lock()
+
+    def reserve(self):
+        """take a token and return the delay to wait before using it"""
+        with self._ops:
+            now = time.monotonic()
+            delay = max(0, self._blocked_until - now)
+
+            if self.rate:
+                elapsed = now - self._last
+                self._tokens = min(self.burst, self._tokens + elapsed * self.rate)
+                self._last = now
+                self._tokens -= 1
+                if self._tokens < 0:
+                    delay = max(delay, -self._tokens / self.rate)
+
+            return delay
+
+    def wait(self):
+        time.sleep(self.reserve())
+
+    def backoff(self, retry_after=None):
+        """block every request for retry_after or an exponential delay, with jitter"""
+        with self._ops:
+            self._n_backoff += 1
+            if retry_after is None:
+                retry_after = min(
+                    self.max_backoff, self.base_backoff * 2 ** (self._n_backoff - 1)
+                )
+            delay = retry_after * random.uniform(1, 1.5)
+            self._blocked_until = max(self._blocked_until, time.monotonic() + delay)
+            return delay
+
+    def success(self):
+        with self._ops:
+            self._n_backoff = 0
@@ -1,49 +1,264 @@
+import atexit
+import json
+import queue
+import random
+import threading
 import time
+from contextlib import contextmanager
+from urllib.parse import urlsplit
 
 import lxml.html
 import requests
 from requests.exceptions import HTTPError, Timeout
+from windows.log import log
+
+from .content_cache import (
+    NOT_MODIFIED,
+    add_conditional_headers,
+    is_fresh,
+    is_unchanged,
+    update_validators,
+)
+from .rate_limiter import THROTTLED_STATUS_CODES, get_retry_after
+
+
+class SessionsPool:
+    """
+    thread safe per host pool of keep-alive requests.Session
+    shared by all RequestsHandler & living as long as the process
+    """
+
+    def __init__(self, pool_size=4):
+        self.pool_size = pool_size
+        self.created = 0
+        self.reused = 0
+        self._available = {}  # host: queue of idle sessions
+        self._n_sessions = {}  # host: number of sessions
+        self._ops = threading.Lock()
+        atexit.register(self.close)
+
+    def set_pool_size(self, pool_size):
+        with self._ops:
+            self.pool_size = pool_size
+
+    def _get(self, host):
+        with self._ops:
+            available = self._available.setdefault(host, queue.Queue())
+            try:
+                session = available.get(block=False)
+                self.reused += 1
+                return session
+
+            except queue.Empty:
+                if self._n_sessions.get(host, 0) < self.pool_size:
+                    self._n_sessions[host] = self._n_sessions.get(host, 0) + 1
+                    self.created += 1
+                    return requests.Session()
+
+        # wait for a session used by another thread
+        session = available.get()
+        with self._ops:
+            self.reused += 1
+        return session
+
+    @contextmanager
+    def session(self, url):
+        host = urlsplit(url).netloc
+        session = self._get(host)
+        try:
+            yield session
+        finally:
+            self._available[host].put(session)
+
+    def get_stats(self):
+        with self._ops:
+            return dict(
+                hosts=len(self._n_sessions),
+                sessions=sum(self._n_sessions.values()),
+                created=self.created,
+                reused=self.reused,
+            )
+
+    def close(self):
+        with self._ops:
+            for available in self._available.values():
+                while not available.empty():
+                    available.get(block=False).close()
+
+
+class CachedRequest:
+    """stands for a RequestsHandler in get_content, with the courier cache"""
+
+    def __init__(self, handler, cache):
+        self.handler = handler
+        self.cache = cache
+
+    def request_json(self, method, url, **kwargs):
+        return self.handler.request_json(method, url, cache=self.cache, **kwargs)
+
+    def request_tree(self, method, url, **kwargs):
+        return self.handler.request_tree(method, url, cache=self.cache, **kwargs)
+
+
+class PendingRequest:
+    """a request recorded by DeferredRequest to be done later"""
+
+    def __init__(self, handler, cache, method, url, kwargs, as_json):
+        self.handler = handler
+        self.cache = cache
+        self.method = method
+        self.url = url
+        self.kwargs = kwargs
+        self.as_json = as_json
+
+
+class DeferredRequest(CachedRequest):
+    """
+    stands for a RequestsHandler in get_content,
+    it only records the request so that it can be done asynchronously
+    """
+
+    def request_json(self, method, url, **kwargs):
+        return PendingRequest(
+            self.handler, self.cache, method, url, kwargs, as_json=True
+        )
+
+    def request_tree(self, method, url, **kwargs):
+        return PendingRequest(
+            self.handler, self.cache, method, url, kwargs, as_json=False
+        )
+
+
+class Retries:
+    """retry policy of a get_content, shared by RequestsHandler & AsyncRequests"""
+
+    def __init__(self, handler, courier, idship):
+        self.handler = handler
+        self.courier = courier
+        self.idship = idship
+        self.n_retry = handler.max_retry
+        self.retry_delay = None
+
+    def failure(self, e, response=None):
+        """log a failed try"""
+        err = type(e).__name__
+        self.courier.log(f"request FAILURE {err} for {self.idship}", error=True)
+        if response is not None:
+            self.retry_delay = self.handler.get_retry_delay(
+                self.courier, response.status_code, response.headers
+            )
+
+    def get_delay(self, content):
+        """return None if it's done or the delay before retrying"""
+        if self.n_retry <= 0 or content is not None:
+            return None
+
+        self.courier.log(f"RETRY request for {self.idship}", error=True)
+        self.n_retry -= 1
+        delay = self.retry_delay
+        self.retry_delay = None
+        return self.handler.get_retry_delay(self.courier) if delay is None else delay
 
 
 class RequestsHandler:
     """decorator to give the decorated function a request handler
     and retry get_content with timeouts"""
 
+    sessions = SessionsPool()
+
     def __init__(self, request_timeout=5, max_retry=1, time_between_retry=1):
         self.request_timeout = request_timeout
         self.max_retry = max_retry
         self.time_between_retry = time_between_retry
 
-    def request(self, method, *args, **kwargs):
-        r = requests.request(method, *args, timeout=self.request_timeout, **kwargs)
+    @classmethod
+    def set_sessions_per_host(cls, pool_size):
+        cls.sessions.set_pool_size(pool_size)
+
+    @classmethod
+    def log_sessions_stats(cls):
+        stats = cls.sessions.get_stats()
+        log(
+            f"Sessions: {stats['sessions']} for {stats['hosts']} host(s)"
+            f", {stats['reused']} reused / {stats['created']} created"
+        )
+
+    def request(self, method, url, cache=None, **kwargs):
+        """
+        conditional request when there's a courier cache,
+        return None if the cached content is still valid
+        """
+        if is_fresh(cache):
+            return None
+
+        kwargs = add_conditional_headers(cache, kwargs)
+        with self.sessions.session(url) as session:
+            r = session.request(method, url, timeout=self.request_timeout, **kwargs)
+        return self.check_response(r, cache)
+
+    @staticmethod
+    def check_response(r, cache):
+        """works with requests & httpx responses"""
+        if r.status_code == 304:
+            update_validators(cache, r.headers)
+            return None
+
         r.raise_for_status()
+        update_validators(cache, r.headers)
         return r
 
-    def request_json(self, method, *args, **kwargs):
-        r = self.request(method, *args, **kwargs)
-        return r.json()
-
-    def request_tree(self, method, *args, **kwargs):
-        r = self.request(method, *args, **kwargs)
+    @staticmethod
+    def to_content(r, as_json, cache=None):
+        if r is None or is_unchanged(cache, r.content):
+            return NOT_MODIFIED
+        if as_json:
+            return json.loads(r.content)
         return lxml.html.fromstring(r.content)
 
+    def request_json(self, method, url, cache=None, **kwargs):
+        r = self.request(method, url, cache, **kwargs)
+        return self.to_content(r, as_json=True, cache=cache)
+
+    def request_tree(self, method, url, cache=None, **kwargs):
+        r = self.request(method, url, cache, **kwargs)
+        return self.to_content(r, as_json=False, cache=cache)
+
+    def get_retry_delay(self, courier, status_code=None, headers=None):
+        """back off the whole courier when throttled, or wait with jitter"""
+        if status_code in THROTTLED_STATUS_CODES:
+            delay = courier.rate_limiter.backoff(get_retry_after(headers))
+            courier.log(f"THROTTLED ({status_code}) for {delay:.1f}s", error=True)
+            return 0  # the rate limiter will wait
+
+        return self.time_between_retry * random.uniform(1, 1.5)
+
     def __call__(self, get_content):
-        def wrapper(courier, idship):
-            n_retry = self.max_retry
+        def wrapper(courier, idship, cache=None):
+            retries = Retries(self, courier, idship)
             while True:
+                courier.rate_limiter.wait()
                 try:
-                    content = get_content(courier, idship, self)
+                    content = get_content(courier, idship, CachedRequest(self, cache))
+                    courier.rate_limiter.success()
 
                 except (Timeout, HTTPError) as e:
-                    err = type(e).__name__
-                    courier.log(f"request FAILURE {err} for {idship}", error=True)
+                    retries.failure(e, getattr(e, "response", None))
                     content = None
 
-                if n_retry <= 0 or content is not None:
+                if (delay := retries.get_delay(content)) is None:
                     return content
+                time.sleep(delay)
+
+        def defer(courier, idship, cache=None):
+            """get_content only works with AsyncRequests if it returns its request"""
+            try:
+                pending = get_content(courier, idship, DeferredRequest(self, cache))
+
+            except Exception:  # pylint: disable=broad-except
+                # get_content uses the response, it can't be deferred
+                return None
 
-                courier.log(f"RETRY request for {idship}", error=True)
-                n_retry -= 1
-                time.sleep(self.time_between_retry)
+            return pending if isinstance(pending, PendingRequest) else None
 
+        wrapper.defer = defer
         return wrapper
@@ -0,0 +1,89 @@
+import heapq
+import itertools
+import threading
+import traceback
+from concurrent.futures import Future
+
+from windows.log import log
+
+
+class _Task:
+    def __init__(self, priority, count, limit_keys, fn, args):
+        self.sort_key = (priority, count)
+        self.limit_keys = limit_keys
+        self.fn = fn
+        self.args = args
+        self.future = Future()
+
+    def __lt__(self, other):
+        return self.sort_key < other.sort_key
+
+
+class UpdateScheduler:
+    """
+    fixed pool of workers shared by all trackers,
+    tasks are run by priority (lower first) as long as their limit keys allow it,
+    a limit key is the courier name or any group of couriers (e.g. scrapers)
+    """
+
+    def __init__(self, max_workers=8):
+        self.max_workers = max_workers
+        self._limits = {}  # limit key: max concurrent tasks
+        self._running = {}  # limit key: n running tasks
+        self._queues = {}  # queue name: heap of tasks
+        self._count = itertools.count()
+        self._ops = threading.Condition()
+
+        for _ in range(max_workers):
+            threading.Thread(target=self._work, daemon=True).start()
+
+    def set_limit(self, key, max_concurrent):
+        with self._ops:
+            self._limits[key] = max_concurrent
+            self._ops.notify_all()
+
+    def submit(self, priority, limit_keys, fn, *args):
+        """limit_keys[0] is the queue name, return a concurrent.futures.Future"""
+        with self._ops:
+            task = _Task(priority, next(self._count), limit_keys, fn, args)
+            heapq.heappush(self._queues.setdefault(limit_keys[0], []), task)
+            self._ops.notify()
+            return task.future
+
+    def _can_run(self, task):
+        return all(
+            self._running.get(key, 0) < self._limits.get(key, float("inf"))
+            for key in task.limit_keys
+        )
+
+    def _pop(self):
+        with self._ops:
+            while True:
+                heads = (queue[0] for queue in self._queues.values() if queue)
+                if task := min(filter(self._can_run, heads), default=None):
+                    heapq.heappop(self._queues[task.limit_keys[0]])
+                    for key in task.limit_keys:
+                        self._running[key] = self._running.get(key, 0) + 1
+                    return task
+
+                self._ops.wait()
+
+    def _done(self, task):
+        with self._ops:
+            for key in task.limit_keys:
+                self._running[key] -= 1
+            self._ops.notify_all()
+
+    def _work(self):
+        while True:
+            task = self._pop()
+            try:
+                if task.future.set_running_or_notify_cancel():
+                    task.future.set_result(task.fn(*task.args))
+
+            except Exception as e:  # pylint: disable=broad-except
+                log(traceback.format_exc(), error=True)
+                task.future.set_exception(e)
+
+            finally:
+                self._done(task)
@@ -1,17 +1,13 @@
-import atexit
-import concurrent.futures
-import concurrent.futures.thread
-import copy
+import heapq
 import threading
 import traceback
+import uuid
 
 from tools.date_parser import get_local_now
+from tools.db_handler import json_dumps
 from windows.log import log
 
-# pylint: disable=protected-access
-# prevent executors from joining threads at program exit and delay it
-# it's ok since the executors can't corrupt any data to save
-atexit.unregister(concurrent.futures.thread._python_exit)
+from .event import Event
 
 
 class TrackerState:
@@ -28,52 +24,102 @@ class SyncNewEvents:
         self.events = {}
         for content in contents:
             for event in content["events"]:
-                self.events[self.get_key(event)] = event
-
-    @staticmethod
-    def get_key(event):
-        """get a key by removing 'new' from the event dict"""
-        return tuple((k, v) for k, v in event.items() if k != "new")
+                self.events[event.key] = event
 
     def update(self, new_content):
         """keep self.events and new_content["events"] in sync"""
         if new_content:
             for event in new_content["events"]:
-                key = self.get_key(event)
-                if key in self.events:
-                    event["new"] = self.events[key].get("new", False)
+                if previous := self.events.get(event.key):
+                    event.new = previous.new
                 else:
-                    event["new"] = True
-                self.events[key] = event
+                    event.new = True
+                self.events[event.key] = event
 
     def remove_new_event(self, event_key):
         if event := self.events.get(event_key):
-            event["new"] = False
+            event.new = False
 
     def remove_all_new_events(self):
         for event in self.events.values():
-            event["new"] = False
+            event.new = False
 
 
 class Contents:
-    def __init__(self, translation_handler, contents):
+    def __init__(self, translation_handler, contents, on_translated=None):
         self.translation = translation_handler
+        self.on_translated = on_translated
         self.contents = contents or {}
+        for content in self.contents.values():
+            content["events"] = [Event.from_dict(evt) for evt in content["events"]]
         self.events = SyncNewEvents(self.contents.values())
         self.critical = threading.Lock()
 
+        # (courier_name, event) of all ok contents sorted by date, see _splice
+        self.timeline = []
+        for courier_name, content in self.contents.items():
+            if content["ok"]:
+                self._splice(courier_name, content["events"])
+
+        # merged contents cache, see get_consolidated
+        self._version = 0
+        self._merged = None
+
+    def _splice(self, courier_name, events):
+        """replace the courier events in the timeline, linear since both are sorted"""
+        others = (record for record in self.timeline if record[0] != courier_name)
+        events = ((courier_name, event) for event in events)
+        self.timeline = list(
+            heapq.merge(others, events, key=lambda record: record[1].date, reverse=True)
+        )
+
+    def _changed(self):
+        self._version += 1
+        self._merged = None
+
+    def _translated(self):
+        """called by the translation worker, the merge has to be done again"""
+        with self.critical:
+            self._changed()
+
+        if self.on_translated:
+            self.on_translated()
+
+    def _get_valid(self, courier_name, idship):
+        content = self.contents.get(courier_name)
+        if content and content["ok"] and content.get("idship") == idship:
+            return content
+        return None
+
+    def get_cache(self, courier_name, idship):
+        """a copy of the courier cache, only if its content is still valid"""
+        with self.critical:
+            content = self._get_valid(courier_name, idship)
+            return dict(content.get("cache") or {}) if content else {}
+
     def update(self, courier_name, new_content):
         with self.critical:
+            if new_content and new_content.get("not_modified"):
+                # keep the previous parsed content
+                if content := self._get_valid(courier_name, new_content["idship"]):
+                    content["cache"] = new_content["cache"]
+                    return True
+                return False
+
             if new_content is not None:
                 if new_content["ok"] or courier_name not in self.contents:
                     new_content["courier_name"] = courier_name
                     self.contents[courier_name] = new_content
                     self.events.update(new_content)
+                    if new_content["ok"]:
+                        self._splice(courier_name, new_content["events"])
+                    self._changed()
 
             return new_content and new_content["ok"]
 
-    def _get_ok(self, idship, courier_names):
-        for courier_name, content in self.contents.items():
+    @staticmethod
+    def _iter_ok(contents, idship, courier_names):
+        for courier_name, content in contents.items():
             if (
                 content["ok"]
                 and courier_name in courier_names
@@ -82,12 +128,21 @@ class Contents:
             ):
                 yield content
 
+    def _get_ok(self, idship, courier_names):
+        return self._iter_ok(self.contents, idship, courier_names)
+
     @staticmethod
     def _get_delivered(contents_ok):
         return any(content["status"].get("delivered") for content in contents_ok)
 
+    @classmethod
+    def get_saved_delivered(cls, saved_contents, idship, courier_names):
+        """without creating Contents"""
+        get_ok = cls._iter_ok(saved_contents or {}, idship, courier_names)
+        return cls._get_delivered(get_ok)
+
     @staticmethod
-    def _no_future(date, now =None):
+    def _no_future(date, now=None):
         if date:  # not in future
             return min(date, now or get_local_now())
         return None
@@ -96,12 +151,57 @@ class Contents:
         """
         gives a copy of contents that can't be tampered with
         where status is the most recent one
-        and events are merged
+        and events are merged,
+        the merge is cached till the contents change
         """
+        key = idship, tuple(courier_names)
         with self.critical:
-            get_ok = self._get_ok(idship, courier_names)
-            contents_ok = [copy.deepcopy(content) for content in get_ok]
+            if self._merged and self._merged[0] == key:
+                return self._set_time_dependent(self._merged[1])
+
+            version = self._version
+            # shallow copies, what's shared is never modified
+            contents_ok = [
+                dict(content, status=dict(content["status"]))
+                for content in self._get_ok(idship, courier_names)
+            ]
+            names_ok = {content["courier_name"] for content in contents_ok}
+            events = [
+                event
+                for courier_name, event in self.timeline
+                if courier_name in names_ok
+            ]
+
+        # merged out of the lock, it may need translations
+        merged = self._merge(contents_ok, events)
+        with self.critical:
+            if version == self._version:
+                self._merged = key, merged
+
+        return self._set_time_dependent(merged)
 
+    def _set_time_dependent(self, merged):
+        consolidated = dict(merged)
+        if consolidated:
+            now = get_local_now()
+            status = consolidated["status"]
+            events = consolidated["events"]
+            if events:
+                end_date = events[0].date if status["delivered"] else now
+                begin_date = self._no_future(events[-1].date, now)
+                consolidated["elapsed"] = end_date - begin_date
+
+            else:
+                consolidated["elapsed"] = None
+
+            consolidated["status"] = dict(
+                status, date=self._no_future(status["date"], now)
+            )
+
+        return consolidated
+
+    def _merge(self, contents_ok, events):
+        """events are already merged & sorted in the timeline"""
         now = get_local_now()
         consolidated = {}
         if len(contents_ok) > 0:
@@ -110,26 +210,9 @@ class Contents:
                 contents_ok, key=lambda content: content["status"]["date"] or now
             )
 
-            # merge all events
-            events = sum((content["events"] for content in contents_ok), [])
-            events.sort(key=lambda evt: evt["date"], reverse=True)
-            consolidated["events"] = events
-
             delivered = self._get_delivered(contents_ok)
             consolidated["status"]["delivered"] = delivered
 
-            if events:
-                end_date = events[0]["date"] if delivered else now
-                begin_date = self._no_future(events[-1]["date"], now)
-                consolidated["elapsed"] = end_date - begin_date
-
-            else:
-                consolidated["elapsed"] = None
-
-            consolidated["status"]["date"] = self._no_future(
-                consolidated["status"]["date"]
-            )
-
             # get the 1st non None product in updated date order
             contents_ok.sort(key=lambda content: content["status"]["date"] or now)
             consolidated["product"] = next(
@@ -147,28 +230,45 @@ class Contents:
                 default=None,
             )
 
-            # translation
-            consolidated["product"] = self.translation.get(consolidated["product"])
-            consolidated["status"]["label"] = self.translation.get(
-                consolidated["status"]["label"]
+            # translation, all labels at once & the missing ones in the background
+            product = consolidated["product"]
+            status_label = consolidated["status"]["label"]
+            translations = self.translation.get_many(
+                [product, status_label, *(event.label for event in events)],
+                on_translated=self._translated,
             )
-            for event in events:
-                event["key"] = self.events.get_key(event)
-                event["label"] = self.translation.get(event["label"])
-                # if event["status"]:
-                #     event["status"] = self.translation.get(event["status"])
+
+            def translate(txt):
+                return translations.get(txt, txt)
+
+            consolidated["product"] = translate(product)
+            consolidated["status"]["label"] = translate(status_label)
+            consolidated["events"] = [
+                event.translated(translate(event.label)) for event in events
+            ]
+            # if event.status:
+            #     event.status = self.translation.get(event.status)
 
         return consolidated
 
-    def get(self):
+    def dumps(self):
+        """serialized while they can't be modified, without copying them"""
         with self.critical:
-            return copy.deepcopy(self.contents)
+            return json_dumps(self.contents)
 
     def get_delivered(self, idship, courier_names):
         with self.critical:
             get_ok = self._get_ok(idship, courier_names)
             return self._get_delivered(get_ok)
 
+    def get_last_date(self, idship, courier_names):
+        with self.critical:
+            get_ok = self._get_ok(idship, courier_names)
+            return max(
+                (date for content in get_ok if (date := content["status"]["date"])),
+                default=None,
+            )
+
     def get_ok_date(self, courier_name):
         with self.critical:
             content = self.contents.get(courier_name)
@@ -177,10 +277,12 @@ class Contents:
     def remove_new_event(self, event_key):
         with self.critical:
             self.events.remove_new_event(event_key)
+            self._changed()
 
     def remove_all_new_events(self):
         with self.critical:
             self.events.remove_all_new_events()
+            self._changed()
 
     def clean(self, all_courier_names):
         with self.critical:
@@ -188,6 +290,7 @@ class Contents:
                 if content := self.contents.get(courier_name):
                     if not content["ok"]:
                         del self.contents[courier_name]
+                        self._changed()
                         yield courier_name
 
 
@@ -236,41 +339,130 @@ class CouriersStatus:
 
 
 class Tracker:
-    def __init__(self, couriers_handler, translation_handler, **kwargs):
+    """
+    archived & deleted trackers are lightweight stubs,
+    their contents & couriers status are only created when needed,
+    the saved contents are given or loaded with load_contents(id)
+    """
+
+    def __init__(
+        self,
+        couriers_handler,
+        translation_handler,
+        on_change=None,
+        load_contents=None,
+        **kwargs,
+    ):
         self.couriers_handler = couriers_handler
+        self.translation_handler = translation_handler
+        self.on_change = None
+        self.on_translated = None
+        self.load_contents = load_contents
+        self.load_ops = threading.Lock()
+        self._contents = None
+        self._saved_contents = kwargs.get("contents")
+
+        self.id = kwargs.get("id") or uuid.uuid4().hex
         self.set(**kwargs)
-        self.state = kwargs.get("state", TrackerState.shown)
         self.creation_date = kwargs.get("creation_date", get_local_now())
-        self.contents = Contents(translation_handler, kwargs.get("contents"))
+        self.state = kwargs.get("state", TrackerState.shown)
 
-        self.executor_ops = threading.Lock()
-        self.executors = []
+        self.futures_ops = threading.Lock()
+        self.futures = set()
+
+        # called with the tracker every time it needs to be saved
+        self.on_change = on_change
+
+    def _changed(self, contents_changed=False):
+        if self.on_change:
+            self.on_change(self, contents_changed)
+
+    def _translated(self):
+        # some translations of the consolidated content are available
+        if self.on_translated:
+            self.on_translated()
+
+    @property
+    def state(self):
+        return self._state
+
+    @state.setter
+    def state(self, state):
+        self._state = state
+        if state == TrackerState.shown:
+            self._load()
+        self._changed()
+
+    def _read_saved_contents(self):
+        if self._saved_contents is None and self.load_contents:
+            return self.load_contents(self.id)
+        return self._saved_contents
+
+    def _get_saved_contents(self):
+        """return False & the saved contents if not loaded yet"""
+        with self.load_ops:
+            if self._contents is not None:
+                return True, None
+            return False, self._read_saved_contents()
+
+    def _load(self):
+        with self.load_ops:
+            if self._contents is None:
+                contents = self._read_saved_contents()
+                self._contents = Contents(
+                    self.translation_handler, contents, self._translated
+                )
+                self._saved_contents = None
+                self._clean(self._contents)
+
+            if self._couriers_status is None:
+                self._couriers_status = CouriersStatus(
+                    self.couriers_handler, self.idship, self.used_couriers
+                )
+
+    @property
+    def contents(self):
+        self._load()
+        return self._contents
+
+    @property
+    def couriers_status(self):
+        self._load()
+        return self._couriers_status
 
     def set(self, **kwargs):
         self.used_couriers = kwargs.get("used_couriers", ())
         self.description = kwargs.get("description", "").strip()  # .capitalize()
         self.idship = kwargs.get("idship", "").upper().strip()
 
-        self.couriers_status = CouriersStatus(
-            self.couriers_handler, self.idship, self.used_couriers
-        )
+        # created with the new idship & used_couriers when needed
+        self._couriers_status = None
+        self._changed()
 
-    def _clean(self):
+    def _clean(self, contents):
+        """only on load & close, return True if some contents were removed"""
+        cleaned = False
         all_courier_names = self.couriers_handler.get_names()
-        for courier_name in self.contents.clean(all_courier_names):
+        for courier_name in contents.clean(all_courier_names):
             log(f"CLEAN {self.description} - {self.idship}, {courier_name}")
+            cleaned = True
+        return cleaned
 
     def get_to_save(self):
-        self._clean()
+        """without the contents, see get_contents_to_save"""
         return dict(
+            id=self.id,
             creation_date=self.creation_date,
             description=self.description,
             idship=self.idship,
             state=self.state,
             used_couriers=self.used_couriers,
-            contents=self.contents.get(),
         )
 
+    def get_contents_to_save(self):
+        """already serialized"""
+        return self.contents.dumps()
+
     def start_updating_idle_couriers(self):
         return [
             courier_name
@@ -284,45 +476,75 @@ class Tracker:
             for courier_name in self.used_couriers
         )
 
-    def update_idle_couriers(self, courier_names):
-        if self.idship and courier_names:
-            log(
-                f'update START - {self.description} - {self.idship}, {" - ".join(courier_names)}'
-            )
-
-            # create threads with executor
-            with self.executor_ops:
-                executor = concurrent.futures.ThreadPoolExecutor(
-                    max_workers=len(courier_names)
-                )
-                futures = {
-                    executor.submit(self._update_courier, courier_name): courier_name
-                    for courier_name in courier_names
-                }
-                self.executors.append(executor)
-
-            # handle threads results
-            for future in concurrent.futures.as_completed(futures):
-                new_content = future.result()
-                courier_name = futures[future]
-                ok = self.contents.update(courier_name, new_content)
-                self.couriers_status.done_updating(courier_name, error=not ok)
-                msg = "DONE" if ok else "FAILED"
-                log(
-                    f"update {msg} - {self.description} - {self.idship}, {courier_name}",
-                    error=not ok,
-                )
+    def update_idle_couriers(self, courier_names, on_content, on_done):
+        """
+        no thread waits for the updates,
+        on_content(consolidated content) is called after each courier update
+        & on_done() when they're all done, by the thread that ends the update
+        """
+        if not (self.idship and courier_names):
+            on_done()
+            return
 
-                yield self.get_consolidated_content()
+        log(
+            f'update START - {self.description} - {self.idship}, {" - ".join(courier_names)}'
+        )
 
-            # dispose executor
-            with self.executor_ops:
-                executor.shutdown()
-                self.executors.remove(executor)
+        # async requests on a single loop, or the shared scheduler workers
+        futures = {}
+        priority = self.get_update_priority()
+        for courier_name in courier_names:
+            cache = self.contents.get_cache(courier_name, self.idship)
+            future = self.couriers_handler.update_async(
+                priority, courier_name, self.idship, cache
+            ) or self.couriers_handler.schedule_update(
+                priority, courier_name, self._update_courier, cache
+            )
+            futures[future] = courier_name
+
+        with self.futures_ops:
+            self.futures.update(futures)
+
+        remaining = [len(futures)]
+
+        def courier_done(future):
+            self._courier_updated(futures[future], future, on_content)
+            with self.futures_ops:
+                self.futures.discard(future)
+                remaining[0] -= 1
+                all_done = remaining[0] == 0
+            if all_done:
+                on_done()
+
+        # called right away by the futures already done
+        for future in futures:
+            future.add_done_callback(courier_done)
+
+    def _courier_updated(self, courier_name, future, on_content):
+        new_content = None if future.cancelled() else future.result()
+        ok = self.contents.update(courier_name, new_content)
+        self.couriers_status.done_updating(courier_name, error=not ok)
+        self._changed(contents_changed=True)
+        msg = "DONE" if ok else "FAILED"
+        log(
+            f"update {msg} - {self.description} - {self.idship}, {courier_name}",
+            error=not ok,
+        )
+        on_content(self.get_consolidated_content())
+
+    def get_update_priority(self):
+        """lower is first: shown, never fetched, not delivered, recent activity"""
+        last_date = self.contents.get_last_date(self.idship, self.used_couriers)
+        return (
+            self.state != TrackerState.shown,
+            last_date is not None,
+            self.get_delivered(),
+            -last_date.timestamp() if last_date else 0,
+        )
 
-    def _update_courier(self, courier_name):
+    def _update_courier(self, courier_name, cache):
         try:
-            return self.couriers_handler.update(courier_name, self.idship)
+            return self.couriers_handler.update(courier_name, self.idship, cache)
 
         except Exception:  # pylint: disable=broad-except
             # catch all to keep the flow
@@ -345,20 +567,32 @@ class Tracker:
         return consolidated
 
     def get_delivered(self):
-        return self.contents.get_delivered(self.idship, self.used_couriers)
+        loaded, saved_contents = self._get_saved_contents()
+        if loaded:
+            return self.contents.get_delivered(self.idship, self.used_couriers)
+
+        return Contents.get_saved_delivered(
+            saved_contents, self.idship, self.used_couriers
+        )
 
     def remove_new_event(self, event_key):
         self.contents.remove_new_event(event_key)
+        self._changed(contents_changed=True)
 
     def remove_all_new_events(self):
         self.contents.remove_all_new_events()
+        self._changed(contents_changed=True)
 
     def open_in_browser(self, courier_name):
         if courier_name in self.used_couriers:
             self.couriers_handler.open_in_browser(courier_name, self.idship)
 
     def close(self):
-        with self.executor_ops:
-            if self.executors:
-                for executor in self.executors:
-                    executor.shutdown(wait=False)  # no join of threads
+        with self.futures_ops:
+            for future in self.futures:
+                future.cancel()  # only cancel the ones still waiting for a worker
+
+        with self.load_ops:
+            contents = self._contents
+        if contents is not None and self._clean(contents):
+            self._changed(contents_changed=True)
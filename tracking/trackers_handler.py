@@ -1,6 +1,8 @@
+from tools.db_handler import DBHandler
 from tools.save_handler import SaveHandler
 from translation.translate import TranslationHandler
 from windows.localization import TXT
+from windows.log import log
 
 from .couriers_handler import CouriersHandler
 from .tracker import Tracker, TrackerState
@@ -13,21 +15,52 @@ class TrackersHandler:
             TXT.locale_country_code, translation_module
         )
 
+        # every tracker change is saved in the db as it happens,
+        # contents are apart so that they're only loaded when needed
+        self.db_handler = DBHandler(filename, table="trackers")
+        self.contents_db_handler = DBHandler(filename, table="contents")
+        if self.db_handler.is_empty():
+            self.import_from_save(filename, load_as_json)
+
         trackers = []
-        self.save_handler = SaveHandler(filename, load_as_json)
-        if loaded_trackers := self.save_handler.load():
-            for kwargs in loaded_trackers:
-                trackers.append(
-                    Tracker(self.couriers_handler, self.translation_handler, **kwargs)
-                )
+        for kwargs in self.db_handler.values():
+            trackers.append(self._create(**kwargs))
 
         self.trackers = self.sort(trackers)
 
-    def save(self):
-        trackers = self.sort(self.get_not_definitly_deleted())
-        to_save_trackers = [tracker.get_to_save() for tracker in trackers]
-        self.save_handler.save_as_json(to_save_trackers)
-        self.save_handler.save_as_binary(to_save_trackers)
+    def _create(self, **kwargs):
+        return Tracker(
+            self.couriers_handler,
+            self.translation_handler,
+            on_change=self.save,
+            load_contents=self.contents_db_handler.get,
+            **kwargs,
+        )
+
+    def import_from_save(self, filename, load_as_json):
+        """import the trackers saved by SaveHandler in a former version"""
+        save_handler = SaveHandler(filename, load_as_json)
+        if loaded_trackers := save_handler.load():
+            trackers = [self._create(**kwargs) for kwargs in loaded_trackers]
+            self.db_handler.put_many(
+                (tracker.id, tracker.get_to_save()) for tracker in trackers
+            )
+            self.contents_db_handler.put_many(
+                (tracker.id, kwargs.get("contents") or {})
+                for tracker, kwargs in zip(trackers, loaded_trackers)
+            )
+            log(f"IMPORT {len(trackers)} trackers")
+
+    def save(self, tracker, contents_changed=False):
+        if tracker.state == TrackerState.definitly_deleted:
+            self.db_handler.delete(tracker.id)
+            self.contents_db_handler.delete(tracker.id)
+        else:
+            self.db_handler.put(tracker.id, tracker.get_to_save())
+            if contents_changed:
+                self.contents_db_handler.put_dumped(
+                    tracker.id, tracker.get_contents_to_save()
+                )
 
     @staticmethod
     def sort(objs, get_tracker=lambda obj: obj):
@@ -36,13 +69,12 @@ class TrackersHandler:
         )
 
     def new(self, idship, description, used_couriers):
-        tracker = Tracker(
-            self.couriers_handler,
-            self.translation_handler,
+        tracker = self._create(
             idship=idship,
             description=description,
             used_couriers=used_couriers,
         )
+        self.save(tracker)
         self.trackers.append(tracker)
         return tracker
 
@@ -57,7 +89,9 @@ class TrackersHandler:
         return len([tracker for tracker in self.trackers if tracker.state == state])
 
     def close(self):
-        self.save()
-        self.translation_handler.save()
+        self.translation_handler.close()
         for tracker in self.trackers:
             tracker.close()
+        self.couriers_handler.close()
+        self.db_handler.close()
+        self.contents_db_handler.close()
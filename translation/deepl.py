@@ -6,6 +6,7 @@ from .translate import SameLanguageError, TranslationService
 
 class DeepL(TranslationService):
     url = "https://api-free.deepl.com/v2/translate"
+    max_texts = 50  # per request
 
     def __init__(self, to_lang):
         self.params = dict(target_lang=to_lang, auth_key=DEEPL_KEY)
@@ -22,3 +23,28 @@ class DeepL(TranslationService):
                         raise SameLanguageError
                     return translation["text"]
         return None
+
+    def translate_many(self, txts):
+        translations = []
+        for i in range(0, len(txts), self.max_texts):
+            chunk = txts[i : i + self.max_texts]
+            translations += self._translate_chunk(chunk) or [None] * len(chunk)
+        return translations
+
+    def _translate_chunk(self, txts):
+        # several text params in a single POST
+        data = dict(self.params, text=txts)
+        r = requests.post(self.url, data=data)
+        if r.status_code == 200:
+            translations = r.json().get("translations") or []
+            if len(translations) == len(txts):
+                return [
+                    (
+                        txt
+                        if translation["detected_source_language"].lower()
+                        == self.to_lang
+                        else translation["text"]
+                    )
+                    for txt, translation in zip(txts, translations)
+                ]
+        return None
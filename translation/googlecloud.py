@@ -7,6 +7,8 @@ from .translate import SameLanguageError, TranslationService
 
 
 class GoogleCloud(TranslationService):
+    max_texts = 128  # per request
+
     def __init__(self, to_lang):
         os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = GOOGLE_CREDENTIAL_PATH
         self.client = translate.Client()
@@ -23,3 +25,18 @@ class GoogleCloud(TranslationService):
             raise SameLanguageError
 
         return result["translatedText"]
+
+    def translate_many(self, txts):
+        translations = []
+        for i in range(0, len(txts), self.max_texts):
+            chunk = txts[i : i + self.max_texts]
+            results = self.client.translate(chunk, **self.kwargs)
+            translations += [
+                (
+                    txt
+                    if result["detectedSourceLanguage"] == self.to_lang
+                    else result["translatedText"]
+                )
+                for txt, result in zip(chunk, results)
+            ]
+        return translations
@@ -1,6 +1,13 @@
 import pkgutil
+import queue
+import re
+import threading
+import traceback
 from abc import ABC, abstractmethod
+from collections import OrderedDict
 
+from langid.langid import LanguageIdentifier, model
+from tools.db_handler import DBHandler
 from tools.save_handler import SaveHandler
 from windows.log import log
 
@@ -32,13 +39,94 @@ class TranslationService(ABC):
     def translate(self, txt):
         pass
 
+    def translate_many(self, txts):
+        """
+        return the list of translations of txts,
+        a translation is the txt itself when it's already in to_lang
+        & None when it failed.
+        one request per txt, override it when the service accepts several txts
+        """
+        translations = []
+        for txt in txts:
+            try:
+                translations.append(self.translate(txt))
+            except SameLanguageError:
+                translations.append(txt)
+        return translations
+
 
 class SameLanguageError(Exception):
     pass
 
 
+# numbers, dates, codes & the proper nouns ending a label after a location word
+# are its parameters, "Arrived in Roissy" or "Arrivé à ROISSY CDG".
+# other words are not, uppercased ones may be part of the label itself.
+# german nouns are capitalized too, the ones with usual suffixes are left out
+_AFTER_LOCATION_WORD = "|".join(
+    rf"(?<=\b{word} )" for word in ("in", "at", "from", "à", "au", "de", "du")
+)
+_CAPITALIZED = r"(?!\w*(?:ung|heit|keit)\b)[A-ZÀ-ÖØ-Þ][\w'.-]*"
+_CONNECTOR = r"(?:de|du|des|la|le|sur|en)"
+_search_params = re.compile(
+    r"\b\w*\d[\w/:.-]*\b"
+    rf"|(?:{_AFTER_LOCATION_WORD})"
+    rf"{_CAPITALIZED}(?:[ -](?:{_CONNECTOR} )*{_CAPITALIZED})*(?=\s*(?:[,;(]|$))"
+)
+_search_placeholder = re.compile(r"\[(\d+)\]")
+_has_letter = re.compile(r"[^\W\d_]").search
+
+
+def to_template(txt):
+    """
+    return txt with [n] placeholders instead of its parameters & the parameters,
+    "Arrived on 12/03 in Roissy" gives "Arrived on [0] in [1]", ["12/03", "Roissy"]
+    """
+    if not _search_placeholder.search(txt):
+        params = []
+
+        def to_placeholder(match):
+            params.append(match.group())
+            return f"[{len(params) - 1}]"
+
+        template = _search_params.sub(to_placeholder, txt)
+        # something's left to translate
+        if params and _has_letter(template):
+            return template, params
+
+    return txt, []
+
+
+def from_template(translation, params):
+    if params:
+        return _search_placeholder.sub(
+            lambda match: params[int(match.group(1))], translation
+        )
+    return translation
+
+
+def has_same_placeholders(template, translation):
+    return sorted(_search_placeholder.findall(template)) == sorted(
+        _search_placeholder.findall(translation)
+    )
+
+
 class TranslationHandler:
-    def __init__(self, to_lang, service_module, do_load=True):
+    """
+    thread safe cache of translations,
+    a txt being translated is never sent twice to the service.
+    templates of txts are translated & cached, see to_template
+    """
+
+    def __init__(
+        self,
+        to_lang,
+        service_module,
+        do_load=True,
+        max_translated=None,
+        min_lang_confidence=0.9,
+    ):
+        self.to_lang = to_lang
         available = " . ".join(TranslationService_Modules)
         log(f"Available translation services: {available}")
 
@@ -52,6 +140,25 @@ class TranslationHandler:
             self.service_name = service_cls.__name__
             self.service = service_cls(to_lang)
 
+            # background translations, see get_many
+            self.worker_ops = threading.Lock()
+            self.worker = None
+            self.queue = queue.Queue()
+
+            # translated is an LRU cache in front of the db,
+            # bounded when max_translated is given
+            self.max_translated = max_translated
+            self.cache_ops = threading.Lock()
+            # txt: threading.Event set once txt's translation is done
+            self.in_flight = {}
+            # templates whose placeholders got lost in translation
+            self.no_template = set()
+
+            # local language detection, see _get_cached
+            self.min_lang_confidence = min_lang_confidence
+            self.identifier_ops = threading.Lock()
+            self.identifier = None
+
             # load cache
             filename = f"translation_{self.service_name}_{to_lang}"
             self.load(filename, do_load)
@@ -72,40 +179,247 @@ class TranslationHandler:
             )
 
     def load(self, filename, do_load):
-        """load cache of translated sentences"""
-        self.save_handler = SaveHandler(filename, load_as_json=True)
-        if do_load and (cache := self.save_handler.load()):
-            self.translated = cache["translated"]
-            self.skip = set(cache["skip"])
-        else:
-            self.translated = {}
-            self.skip = set()
+        """
+        the cache of translated sentences is lazily read from a db
+        & written as soon as a translation arrives,
+        it's only kept in memory without do_load
+        """
+        self.translated = OrderedDict()
+        self.skip = set()
+        self.db_translated = self.db_skip = None
+        if do_load:
+            self.db_translated = DBHandler(filename, table="translated")
+            self.db_skip = DBHandler(filename, table="skip")
+            if self.db_translated.is_empty() and self.db_skip.is_empty():
+                self.import_from_save(filename)
+
+    def import_from_save(self, filename):
+        """import the cache saved by SaveHandler in a former version"""
+        if cache := SaveHandler(filename, load_as_json=True).load():
+            self.db_translated.put_many(cache["translated"].items())
+            self.db_skip.put_many((txt, True) for txt in cache["skip"])
+            log(f"IMPORT {len(cache['translated'])} translations")
+
+    def close(self):
+        for db in (self.db_translated, self.db_skip):
+            if db:
+                db.close()
+
+    def _get_translated(self, txt):
+        """from memory or from the db, called with cache_ops"""
+        if translation := self.translated.get(txt):
+            self.translated.move_to_end(txt)
+
+        elif self.db_translated and (translation := self.db_translated.get(txt)):
+            self.translated[txt] = translation
+            self._evict()
+
+        return translation
+
+    def _is_skipped(self, txt):
+        """from memory or from the db, called with cache_ops"""
+        if txt in self.skip:
+            return True
+
+        if self.db_skip and self.db_skip.get(txt):
+            self.skip.add(txt)
+            return True
+
+        return False
 
-    def save(self):
-        """save cache translated sentences"""
-        cache = dict(translated=self.translated, skip=list(self.skip))
-        self.save_handler.save_as_json(cache)
+    def _add_skipped(self, txts):
+        """called with cache_ops"""
+        self.skip.update(txts)
+        if self.db_skip:
+            self.db_skip.put_many((txt, True) for txt in txts)
+
+    def _evict(self):
+        if self.max_translated:
+            while len(self.translated) > self.max_translated:
+                self.translated.popitem(last=False)
 
     def get(self, txt):
-        if txt:
-            if txt in self.skip:
-                return txt
+        return self.get_many([txt]).get(txt, txt)
+
+    def get_many(self, txts, on_translated=None):
+        """
+        return a dict of the translations of txts,
+        the ones not in the cache are translated with as few requests as possible.
+        with on_translated, the missing ones are given untranslated right away
+        & on_translated() is called once some have been translated in the background
+        """
+        txts = [txt for txt in txts if txt]
+        translations, to_translate = self._get_cached_templates(txts)
+        if to_translate:
+            if on_translated:
+                self._start_worker()
+                self.queue.put((txts, on_translated))
+
+            else:
+                self._translate_templates(txts)
+                translations, _ = self._get_cached_templates(txts)
+
+        return translations
+
+    def _to_template(self, txt):
+        template, params = to_template(txt)
+        if params and template not in self.no_template:
+            return template, params
+        return txt, []
+
+    def _get_cached_templates(self, txts):
+        """return the cached translations of txts & the templates to translate"""
+        templates = {txt: self._to_template(txt) for txt in txts}
+        translations, to_translate = self._get_cached(
+            template for template, _ in templates.values()
+        )
+        translations = {
+            txt: from_template(translations.get(template, template), params)
+            for txt, (template, params) in templates.items()
+        }
+        return translations, to_translate
+
+    def _translate_templates(self, txts):
+        """
+        translate the templates of txts, then right away
+        the whole txts whose template translation lost its placeholders
+        """
+        _, to_translate = self._get_cached_templates(txts)
+        if to_translate:
+            self._translate(to_translate)
+            _, to_translate = self._get_cached_templates(txts)
+            if to_translate:
+                self._translate(to_translate)
+
+    def _get_cached(self, txts):
+        """return the cached translations & the txts to translate"""
+        translations = {}
+        to_translate = []
+        with self.cache_ops:
+            for txt in dict.fromkeys(txts):
+                if txt:
+                    if self._is_skipped(txt):
+                        translations[txt] = txt
+
+                    elif translation := self._get_translated(txt):
+                        translations[txt] = translation
+
+                    else:
+                        to_translate.append(txt)
+
+        # no need to ask the service for these
+        if to_translate:
+            txts, to_translate, to_lang = to_translate, [], []
+            for txt in txts:
+                if not _has_letter(txt):
+                    translations[txt] = txt
+
+                elif self._is_in_to_lang(txt):
+                    translations[txt] = txt
+                    to_lang.append(txt)
+
+                else:
+                    to_translate.append(txt)
 
-            if translation := self.translated.get(txt):
-                return translation
+            if to_lang:
+                with self.cache_ops:
+                    self._add_skipped(to_lang)
 
+        return translations, to_translate
+
+    def _is_in_to_lang(self, txt):
+        with self.identifier_ops:
+            if not self.identifier:
+                # probabilities normalized to get a confidence
+                self.identifier = LanguageIdentifier.from_modelstring(
+                    model, norm_probs=True
+                )
+
+        lang, confidence = self.identifier.classify(txt)
+        return lang == self.to_lang and confidence >= self.min_lang_confidence
+
+    def _translate(self, txts):
+        """translate txts, or wait for the ones already being translated"""
+        mine, others = [], []
+        with self.cache_ops:
+            for txt in txts:
+                if done := self.in_flight.get(txt):
+                    others.append(done)
+                else:
+                    self.in_flight[txt] = threading.Event()
+                    mine.append(txt)
+
+        try:
+            translations = {}
+            if mine:
+                for txt, translation in zip(mine, self.service.translate_many(mine)):
+                    translations[txt] = self._add(txt, translation)
+
+        finally:
+            with self.cache_ops:
+                for txt in mine:
+                    self.in_flight.pop(txt).set()
+
+        if others:
+            for done in others:
+                done.wait()
+            cached, _ = self._get_cached(txts)
+            translations = {txt: cached.get(txt, txt) for txt in txts}
+
+        return translations
+
+    def _start_worker(self):
+        with self.worker_ops:
+            if not self.worker:
+                # daemon thread that'll be killed when exiting
+                self.worker = threading.Thread(
+                    target=self._translate_in_background, daemon=True
+                )
+                self.worker.start()
+
+    def _translate_in_background(self):
+        while True:
+            # batch all what's been queued meanwhile
+            queued = [self.queue.get()]
             try:
-                if translation := self.service.translate(txt):
-                    if txt != translation:
-                        self.translated[txt] = translation
-                        return translation
+                while True:
+                    queued.append(self.queue.get_nowait())
+            except queue.Empty:
+                pass
 
-                    raise SameLanguageError
+            txts = [txt for queued_txts, _ in queued for txt in queued_txts]
+            try:
+                self._translate_templates(txts)
+            except Exception:  # pylint: disable=broad-except
+                # catch all to keep the flow
+                log(traceback.format_exc(), error=True)
 
-            except SameLanguageError:
-                self.skip.add(txt)
-                return txt
+            # call back only when something has been translated,
+            # failed translations would be queued again otherwise
+            translations, _ = self._get_cached_templates(txts)
+            if any(txt != translation for txt, translation in translations.items()):
+                for on_translated in dict.fromkeys(cb for _, cb in queued):
+                    on_translated()
 
+    def _add(self, txt, translation):
+        if translation and not has_same_placeholders(txt, translation):
+            # the whole txts are translated instead, see _translate_templates
+            with self.cache_ops:
+                self.no_template.add(txt)
+            return txt
+
+        if translation:
+            with self.cache_ops:
+                if txt != translation:
+                    self.translated[txt] = translation
+                    self._evict()
+                    if self.db_translated:
+                        self.db_translated.put(txt, translation)
+                    return translation
+
+                self._add_skipped([txt])
+
+        else:
             log(
                 f"Error translating '{txt}' with {self.service_name}",
                 error=True,
@@ -1,6 +1,5 @@
 import re
 import textwrap
-import threading
 from bisect import bisect
 
 import PySimpleGUI as sg
@@ -30,7 +29,7 @@ class EventDates:
     def __init__(self, events):
         self.dates = []
         for evt in events:
-            date = f"{evt['date']:{TXT.long_date_format}}".replace(".", "")
+            date = f"{evt.date:{TXT.long_date_format}}".replace(".", "")
             day, hour = date.split(",")
             self.dates.append((day, hour))
 
@@ -64,8 +63,8 @@ def get_event_labels(event, tab_width):
     wrap the label to not exceed widget_event_max_width
     add tab spaces for each lines
     """
-    event_status = f"{event['status']}, " if event["status"] else ""
-    event_label = f"{event['label']}."
+    event_status = f"{event.status}, " if event.status else ""
+    event_label = f"{event.label}."
     if event_label:
         if event_status:
             event_label = event_label[0].lower() + event_label[1:]
@@ -249,7 +248,7 @@ class EventsWidget:
         self.events_widget.set_size((self.width_events, height))
 
     def _get_event_new(self, event):
-        if event.get("new"):
+        if event.new:
             self.n_new_events += 1
             return f"{TXT.new} ", self.events_font_bold
         return "", self.events_font
@@ -263,7 +262,7 @@ class EventsWidget:
                 self.n_events = len(events)
 
                 events_dates = EventDates(events).get_iterator()
-                events_couriers = [f"{evt['courier']}, " for evt in events]
+                events_couriers = [f"{evt.courier}, " for evt in events]
                 courier_w = max(len(courier) for courier in events_couriers)
 
                 prt = self.events_widget.print
@@ -275,8 +274,8 @@ class EventsWidget:
                     event_new, font = self._get_event_new(event)
                     width = sum(len(txt) for txt in (event_courier, event_date))
                     event_status, event_labels = get_event_labels(event, width)
-                    event_warn = event.get("warn")
-                    event_delivered = event.get("delivered")
+                    event_warn = event.warn
+                    event_delivered = event.delivered
                     event_color = (
                         TH.warn_color
                         if event_warn
@@ -313,7 +312,7 @@ class EventsWidget:
 
                         end_line = start_line + len(event_labels) - 1
                         self.events_widget.buttons.add_tag(
-                            event["key"], f"{start_line}.{0}", f"{end_line}.{width}"
+                            event.key, f"{start_line}.{0}", f"{end_line}.{width}"
                         )
 
                     self.height_events += len(event_labels)
@@ -782,6 +781,10 @@ class TrackerWidget:
 
         self.idship.finalize()
         self.couriers.finalize()
+        # show the late translations
+        self.tracker.on_translated = lambda: window.trigger_event(
+            self._show_current_content
+        )
         self.events.finalize(window)
         self.events.bind_to_expand.bind(
             self.status.status_widget, self.status.ago_widget
@@ -823,28 +826,19 @@ class TrackerWidget:
                 window.trigger_event(Events.updating)
                 self._show_current_courier_widget()
 
-                # daemon threads that'll be killed when exiting
-                threading.Thread(
-                    target=self._update_idle_couriers,
-                    args=(window, couriers),
-                    daemon=True,
-                ).start()
+                # the results are sent back to the window's thread
+                self.tracker.update_idle_couriers(
+                    couriers,
+                    on_content=lambda content: window.trigger_event(
+                        lambda window: self._update_one_courier_done(content, window)
+                    ),
+                    on_done=lambda: window.trigger_event(self._update_done),
+                )
 
             else:
                 self.toolbar.disable_refresh(disabled=True)
                 self._show_current_content(window)
 
-    def _update_idle_couriers(self, window, couriers):
-        for content in self.tracker.update_idle_couriers(couriers):
-            # https://stackoverflow.com/a/10452819
-            window.trigger_event(
-                lambda window, content=content: self._update_one_courier_done(
-                    content, window
-                )
-            )
-
-        window.trigger_event(self._update_done)
-
     def _update_one_courier_done(self, content, window):
         self._show(content, window)
         self.has_something_to_update = self.couriers.is_any_courier()